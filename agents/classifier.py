@@ -1,33 +1,50 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-import os
-import json
-from dotenv import load_dotenv
-load_dotenv()
+from agents.regex import header_days
+import re
+
+# Row labels used by grid timesheets (SABIC style)
+REGULAR_ROW = re.compile(r"^\s*(?:Regular|Reg\.?\s*HR|Normal)\b", re.I | re.M)
+OVERTIME_ROW = re.compile(r"^\s*(?:Overtime|OT)\b", re.I | re.M)
+LEAVE_ROW = re.compile(r"^\s*(?:Leaves?|Holidays?)\b", re.I | re.M)
+
+# Dates as they appear in date-based timesheets
+DATE_PATTERN = re.compile(
+    r"\b(?:\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4}"
+    r"|\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}[\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]\d{2,4})\b",
+    re.I
+)
+
+
+def is_day_header(line: str, min_run: int = 10) -> bool:
+    """True if the line holds a run of min_run+ consecutive day numbers (1..31)"""
+    return len(header_days(line)) >= min_run
+
+
+def _has_day_header(text: str) -> bool:
+    return any(is_day_header(line) for line in text.splitlines())
+
 
 def classify_document(text: str):
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0
-    )
-
-    prompt = ChatPromptTemplate.from_template("""
-Classify this document:
-
-Possible types:
-- ATTENDANCE_GRID
-- ATTENDANCE_DATE_BASED
-- UNKNOWN
-
-Return STRICT JSON:
-{{ "type": "ATTENDANCE_GRID | ATTENDANCE_DATE_BASED | UNKNOWN" }}
-
-TEXT:
-{text}
-""")
-
-    resp = llm.invoke(prompt.format_messages(text=text))
-    try:
-        return json.loads(resp.content)["type"]
-    except:
-        return "UNKNOWN"
+    """
+    Classify a timesheet locally from text features.
+
+    Returns (doc_type, confidence) where doc_type is one of
+    ATTENDANCE_GRID, ATTENDANCE_DATE_BASED or UNKNOWN.
+    """
+    grid_score = 0.0
+    if _has_day_header(text):
+        grid_score += 0.5
+    if REGULAR_ROW.search(text):
+        grid_score += 0.3
+    if OVERTIME_ROW.search(text) or LEAVE_ROW.search(text):
+        grid_score += 0.2
+
+    date_score = min(len(DATE_PATTERN.findall(text)) / 10, 1.0)
+
+    if grid_score < 0.3 and date_score < 0.3:
+        return "UNKNOWN", round(1 - max(grid_score, date_score), 2)
+
+    if grid_score >= date_score:
+        return "ATTENDANCE_GRID", round(grid_score, 2)
+
+    return "ATTENDANCE_DATE_BASED", round(date_score, 2)
@@ -1,56 +1,418 @@
-from utils.pdf_extractor import extract_text_and_images, ocr_images
+from utils.pdf_extractor import extract_text_and_images, iter_pages, iter_ocr_text, MIN_TEXT_CHARS
 from agents.classifier import classify_document
-from agents.groq_llm import groq_attendance_extraction
-from agents.regex import regex_extract
+from agents.segmenter import iter_segments
+from agents.groq_llm import (
+    groq_attendance_extraction, groq_batch_extraction, pack_batches, MODEL_NAME, PROMPT_VERSION
+)
+from agents.regex import regex_grid, regex_sheet
+from agents.table_extractor import table_sheet, is_grid_page
+from utils.cache import get_cache, make_cache_key
+from utils.text_reducer import reduce_for_llm
+from utils.metrics import track_pdf, stage, stage_seconds, add_stage_time
+from utils.memory import MemoryGate
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import itertools
+import logging
+import os
+import queue
+import time
 
-def extract_attendance(pdf_bytes: bytes):
+logger = logging.getLogger(__name__)
+
+# Default number of PDFs extracted concurrently (each one mostly waits on Groq)
+DEFAULT_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "4"))
+
+# Grid documents classified at least this confidently go to regex first
+FAST_PATH_CONFIDENCE = float(os.getenv("FAST_PATH_CONFIDENCE", "0.8"))
+
+# Minimum days the regex parser must find before its result is trusted
+FAST_PATH_MIN_DAYS = 10
+
+# Employees of one multi-employee bundle extracted concurrently
+SEGMENT_WORKERS = int(os.getenv("SEGMENT_WORKERS", str(DEFAULT_WORKERS)))
+
+def extract_attendance(pdf, on_record=None):
+    """
+    Main extraction pipeline for a PDF given as bytes or as a file path
+    (read page by page from disk), served from the extraction cache when this
+    exact PDF was already extracted with the current model and prompt.
+    on_record(record) receives day records as the LLM streams them.
+    
+    A bundle of several employees' timesheets returns one result per
+    employee under "employees" (see employee_results).
+    """
+    with track_pdf():
+        cache, key, cached = _cache_lookup(pdf)
+        if cached is not None:
+            return cached
+        
+        result = _extract_uncached(pdf, on_record)
+        _cache_store(cache, key, result)
+        
+        return result
+
+
+def _cache_lookup(pdf):
+    """Return (cache, key, cached_result); cache and key are None when disabled"""
+    cache = get_cache()
+    if cache is None:
+        return None, None, None
+    
+    key = make_cache_key(pdf, MODEL_NAME, PROMPT_VERSION)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info("Cache hit: %s", cached.get("employee_name"))
+    
+    return cache, key, cached
+
+
+def _cache_store(cache, key, result):
+    # Only successful extractions are worth keeping; a bundle with a failed
+    # employee is extracted again next time
+    if cache is not None and extraction_complete(result):
+        cache.put(key, result)
+
+
+def employee_results(result):
+    """Per-employee results of one PDF: the bundle's employees, or the result itself"""
+    if not result:
+        return []
+    return result.get("employees") or [result]
+
+
+def extraction_complete(result) -> bool:
+    """
+    True if every employee of a result has records and no error. Anything
+    else (e.g. EXTRACTION_FAILED, or a bundle with a failed employee) is
+    not cached and is extracted again on the next run.
+    """
+    employees = employee_results(result)
+    return bool(employees) and all(r.get("records") and not r.get("error") for r in employees)
+
+
+def _extract_uncached(pdf, on_record=None):
     """
     Main extraction pipeline with fallback logic
     """
-    # Step 1: Extract text from PDF
-    text, images = extract_text_and_images(pdf_bytes)
+    text, tables, segments = _read_document(pdf)
+    if segments is not None:
+        return _extract_bundle(pdf, segments)
+    
+    return _extract_text(text, tables, on_record)
+
+
+def _extract_text(text: str, page_tables=None, on_record=None):
+    """Table/regex fast path, then LLM, then regex fallback over one employee's pages"""
+    fast_result = _fast_path(text, page_tables)
+    if fast_result:
+        return fast_result
+    
+    # Step 4: Try LLM extraction first
+    logger.info("Attempting LLM extraction...")
+    llm_text = reduce_for_llm(text)
+    with stage("llm"):
+        llm_result = groq_attendance_extraction(llm_text, on_record=on_record)
+    
+    return _finish(text, llm_result)
+
+
+def _read_document(pdf):
+    """
+    Stream the pages and split them by employee.
+
+    Returns (text, page_tables, None) for a single employee's PDF, or
+    (None, None, segments) for a multi-employee bundle, where segments
+    lazily yields the (first_page, page_texts, page_tables) of each
+    employee as the pages are read. page_tables holds the tables found
+    on each grid-like page (None for other pages).
+    """
+    tables_by_page = []
+    
+    def texts():
+        for text, tables in iter_pages(pdf, want_tables=is_grid_page):
+            tables_by_page.append(tables)
+            yield text
+    
+    # A segment is only yielded once all of its pages (and tables) were read
+    segments = (
+        (start, pages, tables_by_page[start:start + len(pages)])
+        for start, pages in iter_segments(texts())
+    )
+    first = next(segments, None)
+    second = next(segments, None) if first else None
+    
+    if second is None:
+        start, pages, tables = first or (0, [], [])
+        return _read_text(pdf, pages, start), tables, None
+    
+    logger.info("Multi-employee bundle: splitting by employee")
+    return None, None, itertools.chain([first, second], segments)
+
+
+def _extract_segment(pdf, start: int, pages, page_tables):
+    """
+    One employee of a bundle. A failure is returned as that employee's
+    entry (no records, "error" set) so the other employees are kept.
+    """
+    try:
+        result = _extract_text(_read_text(pdf, pages, start), page_tables)
+    except Exception as e:
+        logger.exception("Bundle pages %d-%d failed", start + 1, start + len(pages))
+        result = {
+            "employee_name": "EXTRACTION_FAILED",
+            "employee_code": "",
+            "records": [],
+            "error": f"{type(e).__name__}: {e}",
+        }
+    result["pages"] = [start + 1, start + len(pages)]
+    return result
+
+
+def _extract_bundle(pdf, segments):
+    """Extract every employee segment in parallel; results keep page order"""
+    with ThreadPoolExecutor(max_workers=max(1, SEGMENT_WORKERS)) as pool:
+        # Segments are submitted as they are found, while later pages are still parsed
+        futures = [
+            pool.submit(_extract_segment, pdf, start, pages, tables)
+            for start, pages, tables in segments
+        ]
+        employees = [future.result() for future in futures]
+    
+    logger.info("Bundle: %d employee(s) extracted", len(employees))
+    return {
+        "employee_name": f"{len(employees)} employees",
+        "employee_code": "",
+        "attendance_type": "BUNDLE",
+        "records": [],
+        "employees": employees,
+    }
+
+
+def _read_text(pdf, pages, first_page: int = 0) -> str:
+    # Step 1: Text layer of the pages (they are only rendered if OCR is needed)
+    text, images, empty_pages = extract_text_and_images(pdf, pages, first_page)
     
-    print(f"\n{'='*60}")
-    print(f"Extracted {len(text)} characters of text")
-    print(f"Found {len(images)} images")
+    logger.info("Extracted %d characters of text", len(text))
+    logger.info("Found %d page(s) without a usable text layer", empty_pages)
     
     # Step 2: OCR if text is too short
-    if len(text) < 50 and images:
-        print("Text too short, running OCR...")
-        ocr_text = ocr_images(images)
-        text += "\n" + ocr_text
-        print(f"After OCR: {len(text)} characters")
+    if len(text) < MIN_TEXT_CHARS and empty_pages:
+        logger.info("Text too short, running OCR on %d page(s)...", empty_pages)
+        ocr_start, render_before = time.perf_counter(), stage_seconds("render")
+        for page_num, page_text in enumerate(iter_ocr_text(images), start=1):
+            text += "\n" + page_text
+            logger.debug("OCR page %d/%d: %d characters", page_num, empty_pages, len(page_text))
+        text = text.strip()
+        # Pages are rendered lazily inside the OCR loop; keep that time under "render"
+        ocr_seconds = time.perf_counter() - ocr_start - (stage_seconds("render") - render_before)
+        add_stage_time("ocr", ocr_seconds, empty_pages)
+        logger.info("After OCR: %d characters", len(text))
+    
+    return text
+
+
+def _trusted(sheet, aligned=True) -> bool:
+    """
+    A local (table/regex) sheet is used instead of the LLM only if it is
+    this complete and every grid row had one cell per header day.
+    """
+    return (
+        sheet is not None
+        and aligned
+        and sheet.employee_name != "UNKNOWN"
+        and len(sheet) >= FAST_PATH_MIN_DAYS
+    )
+
+
+def _fast_path(text: str, page_tables=None):
+    # Step 3: Grid tables map cells to day columns directly
+    if page_tables:
+        table_result = table_sheet(text, page_tables)
+        if _trusted(table_result):
+            logger.info("Table path: grid table extraction for %s", table_result.employee_name)
+            return table_result.fill_missing().to_dict()
     
-    # Step 3: Classify document (optional, for logging)
-    doc_type = classify_document(text)
-    print(f"Document type: {doc_type}")
+    # Step 3b: Classify document locally
+    with stage("classify"):
+        doc_type, confidence = classify_document(text)
+    logger.info("Document type: %s (confidence %.2f)", doc_type, confidence)
     
-    # Step 4: Try LLM extraction first
-    print("Attempting LLM extraction...")
-    llm_result = groq_attendance_extraction(text)
+    # Well-formed grids are handled by the regex parser without any LLM call
+    if doc_type == "ATTENDANCE_GRID" and confidence >= FAST_PATH_CONFIDENCE:
+        with stage("regex"):
+            regex_result, aligned = regex_grid(text)
+        if _trusted(regex_result, aligned):
+            logger.info("Fast path: regex extraction of grid document for %s", regex_result.employee_name)
+            return regex_result.fill_missing().to_dict()
     
+    return None
+
+
+def _finish(text: str, llm_result):
+    """Accept the LLM result or fall back to regex"""
     if llm_result and llm_result.get("records"):
-        print(f"✅ LLM extraction successful!")
-        print(f"   Employee: {llm_result.get('employee_name')}")
-        print(f"   Records: {len(llm_result.get('records', []))}")
+        logger.info(
+            "LLM extraction successful: %s, %d records",
+            llm_result.get("employee_name"), len(llm_result.get("records", []))
+        )
         return llm_result
     
     # Step 5: Fallback to regex
-    print("⚠️ LLM extraction failed, trying regex fallback...")
-    regex_result = regex_extract(text)
+    logger.warning("LLM extraction failed, trying regex fallback...")
+    with stage("regex"):
+        regex_result = regex_sheet(text)
     
-    if regex_result and regex_result.get("records"):
-        print(f"✅ Regex extraction successful!")
-        print(f"   Employee: {regex_result.get('employee_name')}")
-        print(f"   Records: {len(regex_result.get('records', []))}")
-        return regex_result
+    if len(regex_result):
+        logger.info(
+            "Regex extraction successful: %s, %d records",
+            regex_result.employee_name, len(regex_result)
+        )
+        return regex_result.to_dict()
     
     # Step 6: Return empty result if all fail
-    print("❌ All extraction methods failed")
-    print(f"Text preview: {text[:200]}")
+    logger.error("All extraction methods failed. Text preview: %r", text[:200])
     
     return {
         "employee_name": "EXTRACTION_FAILED",
         "employee_code": "",
         "records": []
-    }
\ No newline at end of file
+    }
+
+
+def _prepare_for_batch(pdf):
+    """
+    Run every step before the LLM call.
+
+    Returns (result, None) when the PDF is already resolved (cache hit or
+    fast path), else (None, (text, llm_text, cache, key)) for the batched
+    LLM stage, where llm_text is the reduced prompt text.
+    """
+    with track_pdf():
+        cache, key, cached = _cache_lookup(pdf)
+        if cached is not None:
+            return cached, None
+        
+        text, tables, segments = _read_document(pdf)
+        if segments is not None:
+            # Bundles are split and extracted here, one LLM request per employee
+            result = _extract_bundle(pdf, segments)
+            _cache_store(cache, key, result)
+            return result, None
+        
+        fast_result = _fast_path(text, tables)
+        if fast_result:
+            _cache_store(cache, key, fast_result)
+            return fast_result, None
+        
+        return None, (text, reduce_for_llm(text), cache, key)
+
+
+def _completed(futures, events, on_record):
+    """
+    Yield futures as they complete while relaying (index, record) events
+    from worker threads to on_record on the calling thread.
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+        while on_record and not events.empty():
+            on_record(*events.get_nowait())
+        yield from done
+
+
+def extract_many(pdfs, max_workers=None, on_done=None, batch_llm=False, on_record=None, memory_gate=None):
+    """
+    Run extract_attendance over several PDFs (bytes or file paths) with
+    bounded concurrency.
+
+    Results are returned in the same order as pdfs as
+    (result, error) tuples. on_done(index, result, error) is called as
+    each PDF finishes, in completion order, and on_record(index, record)
+    as day records stream in; both run on the calling thread. With
+    batch_llm, documents that need the LLM are packed several per request
+    (see groq_batch_extraction) and are not streamed.
+
+    New PDFs are held back while resident memory is above the limit of
+    memory_gate (a MemoryGate, by default one with MEMORY_LIMIT_MB).
+    """
+    max_workers = max(1, max_workers or DEFAULT_WORKERS)
+    outcomes = [None] * len(pdfs)
+    events = queue.Queue()
+    gate = memory_gate or MemoryGate()
+    
+    def gated(func, *args):
+        gate.acquire()
+        try:
+            return func(*args)
+        finally:
+            gate.release()
+    
+    def finish(idx, result, error):
+        outcomes[idx] = (result, error)
+        if on_done:
+            on_done(idx, result, error)
+    
+    def stream_to(idx):
+        if on_record is None:
+            return None
+        return lambda record: events.put((idx, record))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if batch_llm:
+            futures = {
+                pool.submit(gated, _prepare_for_batch, pdf): idx
+                for idx, pdf in enumerate(pdfs)
+            }
+        else:
+            futures = {
+                pool.submit(gated, extract_attendance, pdf, stream_to(idx)): idx
+                for idx, pdf in enumerate(pdfs)
+            }
+        
+        pending = {}
+        for future in _completed(futures, events, on_record):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                finish(idx, None, e)
+                continue
+            
+            if not batch_llm:
+                finish(idx, result, None)
+            elif result[1] is None:
+                finish(idx, result[0], None)
+            else:
+                pending[str(idx)] = result[1]
+        
+        if not pending:
+            return outcomes
+        
+        # Batched LLM stage over the documents nothing else could resolve
+        batches = pack_batches({doc_id: item[1] for doc_id, item in pending.items()})
+        logger.info("Packed %d document(s) into %d LLM request(s)", len(pending), len(batches))
+        
+        def run_batch(texts):
+            with stage("llm"):
+                return groq_batch_extraction(texts)
+        
+        futures = {
+            pool.submit(run_batch, {doc_id: pending[doc_id][1] for doc_id in batch}): batch
+            for batch in batches
+        }
+        for future in _completed(futures, events, on_record):
+            batch = futures[future]
+            try:
+                llm_results = future.result()
+            except Exception as e:
+                for doc_id in batch:
+                    finish(int(doc_id), None, e)
+                continue
+            
+            for doc_id in batch:
+                text, _, cache, key = pending[doc_id]
+                result = _finish(text, llm_results.get(doc_id))
+                _cache_store(cache, key, result)
+                finish(int(doc_id), result, None)
+
+    return outcomes
@@ -1,44 +1,30 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from agents.llm_client import invoke_llm, stream_llm, estimate_tokens, MODEL_NAME
+from agents.stream_parser import RecordStreamParser, StreamAborted
+from utils.attendance import AttendanceSheet
+import hashlib
 import json
+import logging
+import os
 import re
 
 load_dotenv()
 
-def normalize_records(records):
-    """Normalize records to ensure all days 1-31 are present with proper values"""
-    fixed = {}
-
-    for r in records:
-        day = int(r.get("day", 0))
-        hours = float(r.get("hours", 0))
-        status = r.get("status", "ABSENT")
-
-        if 1 <= day <= 31:
-            fixed[day] = {
-                "day": day,
-                "hours": max(0, hours),
-                "status": status.upper().strip()
-            }
-
-    # Fill missing days with ABSENT status
-    for d in range(1, 32):
-        if d not in fixed:
-            fixed[d] = {"day": d, "hours": 0, "status": "ABSENT"}
+logger = logging.getLogger(__name__)
 
-    return list(sorted(fixed.values(), key=lambda x: x["day"]))
+# Bump whenever parsing or normalization of results changes (regex and
+# table parsers, normalize_records, ...), so cached results are no longer
+# reused; prompt edits are picked up by PROMPT_VERSION on their own
+PARSER_VERSION = "2"
 
+def normalize_records(records):
+    """Normalize records to ensure all days 1-31 are present with proper values"""
+    return AttendanceSheet().add_records(records).fill_missing().records()
 
-def groq_attendance_extraction(text: str):
-    """Extract attendance from PDF text using Groq LLM - Generic for any format"""
-    
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0
-    )
 
-    prompt = ChatPromptTemplate.from_template("""
+# Shared extraction rules, used by both the single and the batched prompt
+EXTRACTION_INSTRUCTIONS = """
 You are an EXPERT Attendance Data Extractor. Your ONLY job is to extract EXACT attendance data from ANY company's timesheet.
 
 **CRITICAL: EXTRACT EXACTLY WHAT YOU SEE. NO ASSUMPTIONS. NO AVERAGES.**
@@ -206,14 +192,47 @@ This means extraction is CORRECT
 9. NO explanation text
 10. Verify total hours match timesheet total
 
-**TEXT TO EXTRACT FROM:**
+"""
+
+EXTRACTION_PROMPT = ChatPromptTemplate.from_template(EXTRACTION_INSTRUCTIONS + """**TEXT TO EXTRACT FROM:**
 {text}
 
 **START EXTRACTION NOW:**
 """)
 
-    response = llm.invoke(prompt.format_messages(text=text))
-    content = response.content.strip()
+BATCH_PROMPT = ChatPromptTemplate.from_template(EXTRACTION_INSTRUCTIONS + """===== BATCH MODE =====
+The text below contains SEVERAL separate timesheets, one per employee.
+Each one starts with a line "=== DOCUMENT <id> ===".
+Apply ALL rules above to EACH document independently. NEVER mix data between documents.
+
+Return ONLY a JSON array with exactly one object per document, in the same format as above plus its id:
+[
+  {{"doc_id": "<id>", "employee_name": "...", "employee_code": "...", "records": [...]}},
+  ...
+]
+
+**DOCUMENTS TO EXTRACT FROM:**
+{documents}
+
+**START EXTRACTION NOW:**
+""")
+
+# Version of cached extraction results: a hash of the prompt texts plus PARSER_VERSION
+PROMPT_VERSION = PARSER_VERSION + "-" + hashlib.sha256("".join(
+    prompt.messages[0].prompt.template for prompt in (EXTRACTION_PROMPT, BATCH_PROMPT)
+).encode("utf-8")).hexdigest()[:12]
+
+# Expected completion size for one employee's 31 records
+RECORDS_OUTPUT_TOKENS = 800
+
+# Token budget (documents + expected output) for one batched request
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "6000"))
+BATCH_MAX_DOCS = int(os.getenv("BATCH_MAX_DOCS", "8"))
+
+
+def _parse_json_content(content: str):
+    """Strip markdown fences around an LLM response and parse it as JSON"""
+    content = content.strip()
     
     # Remove markdown code blocks
     content = re.sub(r'^```json\s*', '', content, flags=re.IGNORECASE)
@@ -224,14 +243,120 @@ This means extraction is CORRECT
     if content.startswith('`'):
         content = content.strip('`').strip()
 
+    return json.loads(content), content
+
+
+def groq_attendance_extraction(text: str, on_record=None):
+    """
+    Extract attendance from PDF text using Groq LLM - Generic for any format
+
+    With on_record, the completion is streamed and on_record(record) is
+    called for each day record as soon as it is complete.
+    """
+    messages = EXTRACTION_PROMPT.format_messages(text=text)
+
+    if on_record:
+        content = _stream_extraction(messages, on_record)
+        if content is None:
+            return None
+    else:
+        content = invoke_llm(messages).content
+
     try:
-        data = json.loads(content)
+        data, _ = _parse_json_content(content)
         
         if data.get("records"):
             data["records"] = normalize_records(data["records"])
 
         return data
     except json.JSONDecodeError as e:
-        print(f"JSON parse error: {e}")
-        print(f"LLM returned: {content[:500]}")
-        return None
\ No newline at end of file
+        logger.warning("JSON parse error: %s. LLM returned: %r", e, content[:500])
+        return None
+
+
+def _stream_extraction(messages, on_record):
+    """Stream the completion into on_record; None if it was aborted early"""
+    parser = RecordStreamParser()
+    stream = stream_llm(messages)
+
+    try:
+        for chunk in stream:
+            for record in parser.feed(chunk):
+                on_record(record)
+    except StreamAborted as e:
+        logger.warning("Aborting LLM stream: %s", e)
+        return None
+    finally:
+        stream.close()
+
+    return parser.buffer
+
+
+def pack_batches(texts, token_budget=BATCH_TOKEN_BUDGET, max_docs=BATCH_MAX_DOCS):
+    """
+    Greedily group document ids into batches that fit the token budget.
+
+    texts maps doc_id -> text. Documents too large to share a request end
+    up alone in their batch.
+    """
+    batches = []
+    current, used = [], 0
+
+    for doc_id, text in texts.items():
+        cost = estimate_tokens(text) + RECORDS_OUTPUT_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_docs):
+            batches.append(current)
+            current, used = [], 0
+        current.append(doc_id)
+        used += cost
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def groq_batch_extraction(texts):
+    """
+    Extract several documents in one LLM request.
+
+    texts maps doc_id -> text; returns doc_id -> result (or None). Documents
+    missing from a malformed or incomplete batch response are retried with
+    one request each.
+    """
+    if len(texts) == 1:
+        doc_id, text = next(iter(texts.items()))
+        return {doc_id: groq_attendance_extraction(text)}
+
+    documents = "\n\n".join(
+        f"=== DOCUMENT {doc_id} ===\n{text}" for doc_id, text in texts.items()
+    )
+    response = invoke_llm(
+        BATCH_PROMPT.format_messages(documents=documents),
+        max_output_tokens=RECORDS_OUTPUT_TOKENS * len(texts)
+    )
+
+    results = {}
+    try:
+        data, _ = _parse_json_content(response.content)
+        if not isinstance(data, list):
+            raise ValueError("batch response is not a JSON array")
+
+        for item in data:
+            doc_id = str(item.get("doc_id", ""))
+            if doc_id in texts and item.get("records"):
+                item.pop("doc_id")
+                item["records"] = normalize_records(item["records"])
+                results[doc_id] = item
+    except (ValueError, AttributeError, TypeError) as e:
+        # json.JSONDecodeError is a ValueError
+        logger.warning(
+            "Batch response malformed (%s), falling back to per-document calls. LLM returned: %r",
+            e, response.content[:500]
+        )
+
+    for doc_id, text in texts.items():
+        if doc_id not in results:
+            results[doc_id] = groq_attendance_extraction(text)
+
+    return results
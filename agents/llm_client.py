@@ -0,0 +1,247 @@
+from agents.llm_transport import build_model
+from langchain_groq import ChatGroq
+from dotenv import load_dotenv
+import groq
+import httpx
+import logging
+import os
+import random
+import threading
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "llama-3.3-70b-versatile"
+
+# Groq quota for the model (requests and tokens per minute)
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "12000"))
+
+# Retry policy for 429 / 5xx / connection errors
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+
+# Pooled HTTP connections shared by every LLM call
+MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "16"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    """
+    Token-bucket scheduler for the model's requests/minute and tokens/minute
+    budgets. Callers block in acquire() until both buckets can cover them.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+        self.waiting = 0
+        self.calls = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int) -> float:
+        """Wait for capacity for one request of `tokens` tokens; return the wait in seconds"""
+        # A request larger than the whole budget could never fit otherwise
+        tokens = min(tokens, self.tpm)
+        start = time.monotonic()
+
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    if self._requests >= 1 and self._tokens >= tokens:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        break
+                    delay = max(
+                        (1 - self._requests) * 60 / self.rpm,
+                        (tokens - self._tokens) * 60 / self.tpm,
+                    )
+                    self._cond.wait(timeout=max(delay, 0.05))
+            finally:
+                self.waiting -= 1
+
+            waited = time.monotonic() - start
+            self.calls += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+        return waited
+
+    def penalize(self):
+        """Empty the buckets after a 429 so queued callers back off too"""
+        with self._cond:
+            self._refill()
+            self._requests = 0.0
+            self._tokens = 0.0
+
+    def record_retry(self):
+        with self._cond:
+            self.retries += 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queue_depth": self.waiting,
+                "calls": self.calls,
+                "retries": self.retries,
+                "total_wait_s": round(self.total_wait, 2),
+                "avg_wait_s": round(self.total_wait / self.calls, 2) if self.calls else 0.0,
+                "max_wait_s": round(self.max_wait, 2),
+            }
+
+
+_llm = None
+_llm_lock = threading.Lock()
+_limiter = RateLimiter(GROQ_RPM, GROQ_TPM)
+
+
+def groq_client():
+    """New ChatGroq client with a pooled HTTP connection"""
+    return ChatGroq(
+        model=MODEL_NAME,
+        temperature=0,
+        # Retries are handled by invoke_llm so they respect the rate limiter
+        max_retries=0,
+        http_client=httpx.Client(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            )
+        ),
+    )
+
+
+def get_llm():
+    """
+    Process-wide chat model: ChatGroq with a pooled HTTP connection, or
+    the record/replay/fake transport selected with LLM_MODE
+    """
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = build_model(groq_client, MODEL_NAME)
+        return _llm
+
+
+def set_llm(llm):
+    """
+    Replace the shared chat model, e.g. with an llm_transport model for
+    benchmarks. Anything with invoke(messages) and stream(messages) works.
+    """
+    global _llm
+    with _llm_lock:
+        _llm = llm
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, groq.APIConnectionError):
+        return True
+    status = getattr(e, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def _retry_delay(e: Exception, attempt: int) -> float:
+    """
+    Server-provided Retry-After plus up to BACKOFF_BASE seconds of jitter
+    (never earlier than the server asked), else jittered exponential backoff
+    """
+    response = getattr(e, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(0.0, float(retry_after)) + random.uniform(0, BACKOFF_BASE)
+    except (TypeError, ValueError):
+        return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _call_with_retries(call, messages, max_output_tokens):
+    """Run call() through the rate limiter, retrying rate-limit, server and connection errors"""
+    prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+    # Recorded and scripted responses don't count against the Groq quota
+    offline = getattr(get_llm(), "offline", False)
+
+    for attempt in range(MAX_RETRIES + 1):
+        if not offline:
+            waited = _limiter.acquire(prompt_tokens + max_output_tokens)
+            if waited > 1:
+                logger.info("Waited %.1fs for Groq quota (queue depth %d)", waited, _limiter.waiting)
+
+        try:
+            return call()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+
+            if getattr(e, "status_code", None) == 429:
+                _limiter.penalize()
+
+            delay = _retry_delay(e, attempt)
+            _limiter.record_retry()
+            logger.warning(
+                "Groq error (%s), retry %d/%d in %.1fs",
+                e.__class__.__name__, attempt + 1, MAX_RETRIES, delay
+            )
+            time.sleep(delay)
+
+
+def invoke_llm(messages, max_output_tokens: int = 1000):
+    """
+    Send messages to the shared model through the rate limiter,
+    retrying rate-limit, server and connection errors with backoff.
+    """
+    return _call_with_retries(lambda: get_llm().invoke(messages), messages, max_output_tokens)
+
+
+def stream_llm(messages, max_output_tokens: int = 1000):
+    """
+    Stream the completion as text chunks. The request is scheduled and
+    retried like invoke_llm until the first chunk arrives; closing the
+    generator early abandons the rest of the completion.
+    """
+    def start():
+        stream = get_llm().stream(messages)
+        # Pull the first chunk here so connection/429 errors are retried
+        return stream, next(stream, None)
+
+    stream, first = _call_with_retries(start, messages, max_output_tokens)
+    if first is None:
+        return
+
+    try:
+        yield first.content
+        for chunk in stream:
+            yield chunk.content
+    finally:
+        stream.close()
+
+
+def scheduler_stats():
+    """Queue depth, wait times and retry counts of the shared LLM scheduler"""
+    stats = _limiter.stats()
+    if hasattr(_llm, "hits"):
+        # Replay transport: how many prompts had a recording
+        stats["replay_hits"] = _llm.hits
+        stats["replay_misses"] = _llm.misses
+    return stats
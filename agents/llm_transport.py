@@ -0,0 +1,218 @@
+"""
+Transports behind get_llm(), selected with LLM_MODE:
+
+- live:   Groq (default)
+- record: Groq, saving every response under LLM_RECORDINGS by prompt hash
+- replay: recorded responses only, no network; prompts without a
+          recording go to the scripted model if LLM_SCRIPT is set
+- fake:   the scripted local model only
+
+LLM_SCRIPT names a function "module:function" that maps the prompt text
+to the response text (e.g. benchmarks.fake_llm:answer). Offline models
+can simulate latency with LLM_LATENCY_MS and LLM_TOKENS_PER_S.
+"""
+from abc import ABC, abstractmethod
+from langchain_core.messages import AIMessage, AIMessageChunk
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MODES = ("live", "record", "replay", "fake")
+
+# Modes that call Groq and so need GROQ_API_KEY
+LIVE_MODES = ("live", "record")
+
+LLM_MODE = os.getenv("LLM_MODE", "live").lower()
+RECORDINGS_DIR = os.getenv("LLM_RECORDINGS", "recordings")
+LLM_SCRIPT = os.getenv("LLM_SCRIPT")
+LATENCY_MS = float(os.getenv("LLM_LATENCY_MS", "0"))
+TOKENS_PER_S = float(os.getenv("LLM_TOKENS_PER_S", "0")) or None
+
+STREAM_CHUNK_CHARS = 16
+
+
+class RecordingMiss(LookupError):
+    """No recorded response for a prompt in replay mode"""
+
+
+def prompt_hash(messages, model: str) -> str:
+    """Stable key of a request: the model plus every message's role and content"""
+    payload = json.dumps([model, [[m.type, str(m.content)] for m in messages]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_script(spec: str):
+    """Import the "module:function" scripted responder"""
+    module_name, _, func_name = spec.partition(":")
+    if not func_name:
+        raise ValueError(f"LLM_SCRIPT must look like module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+class OfflineModel(ABC):
+    """
+    Base of the local models: ChatGroq-style invoke/stream over a text
+    answer, paced by latency_ms per request and tokens_per_s of output.
+    Offline models bypass the Groq rate limiter.
+    """
+
+    offline = True
+
+    def __init__(self, latency_ms: float = 0, tokens_per_s: float = None):
+        self.latency_ms = latency_ms
+        self.tokens_per_s = tokens_per_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _answer(self, messages) -> str:
+        """Response text for a prompt"""
+
+    def _generation_time(self, content: str) -> float:
+        seconds = self.latency_ms / 1000
+        if self.tokens_per_s:
+            seconds += len(content) / 4 / self.tokens_per_s
+        return seconds
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def invoke(self, messages):
+        self._next_call()
+        content = self._answer(messages)
+        time.sleep(self._generation_time(content))
+        return AIMessage(content=content)
+
+    def stream(self, messages):
+        self._next_call()
+        content = self._answer(messages)
+        chunks = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        delay = self._generation_time(content) / max(len(chunks), 1)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield AIMessageChunk(content=chunk)
+
+
+class ScriptedModel(OfflineModel):
+    """Local fake model: script(prompt_text) -> response text"""
+
+    def __init__(self, script, latency_ms: float = 0, tokens_per_s: float = None):
+        super().__init__(latency_ms, tokens_per_s)
+        self.script = script
+
+    def _answer(self, messages) -> str:
+        return self.script(str(messages[-1].content))
+
+
+class ResponseStore:
+    """Recorded responses on disk, one JSON file per prompt hash"""
+
+    def __init__(self, directory: str, model: str):
+        self.directory = directory
+        self.model = model
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, messages):
+        try:
+            with open(self._path(prompt_hash(messages, self.model)), encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except FileNotFoundError:
+            return None
+
+    def put(self, messages, content: str):
+        key = prompt_hash(messages, self.model)
+        path = self._path(key)
+        # Write-then-rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "prompt_hash": key, "content": content}, f)
+        os.replace(tmp_path, path)
+
+
+class ReplayModel(OfflineModel):
+    """Serves recorded responses; misses go to fallback (an OfflineModel) or raise RecordingMiss"""
+
+    def __init__(self, store: ResponseStore, fallback=None, latency_ms: float = 0, tokens_per_s: float = None):
+        super().__init__(latency_ms, tokens_per_s)
+        self.store = store
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+
+    def _answer(self, messages) -> str:
+        content = self.store.get(messages)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if content is not None:
+            return content
+
+        if self.fallback is None:
+            raise RecordingMiss(
+                f"No recording for prompt {prompt_hash(messages, self.store.model)[:12]} "
+                f"in {self.store.directory}"
+            )
+        logger.info("No recording for prompt, using the scripted model")
+        return self.fallback._answer(messages)
+
+
+class RecordingModel:
+    """Live model wrapper that saves every complete response to the store"""
+
+    offline = False
+
+    def __init__(self, model, store: ResponseStore):
+        self.model = model
+        self.store = store
+
+    def invoke(self, messages):
+        response = self.model.invoke(messages)
+        self.store.put(messages, response.content)
+        return response
+
+    def stream(self, messages):
+        parts = []
+        stream = self.model.stream(messages)
+        try:
+            for chunk in stream:
+                parts.append(chunk.content)
+                yield chunk
+        finally:
+            stream.close()
+        # Only reached when the stream was consumed to the end
+        self.store.put(messages, "".join(parts))
+
+
+def build_model(live_factory, model_name: str, mode: str = None):
+    """Chat model for the configured LLM_MODE; live_factory() creates the Groq client"""
+    mode = (mode or LLM_MODE).lower()
+    if mode not in MODES:
+        raise ValueError(f"LLM_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+
+    if mode == "live":
+        return live_factory()
+
+    if mode == "record":
+        logger.info("Recording LLM responses to %s", RECORDINGS_DIR)
+        return RecordingModel(live_factory(), ResponseStore(RECORDINGS_DIR, model_name))
+
+    scripted = ScriptedModel(load_script(LLM_SCRIPT), LATENCY_MS, TOKENS_PER_S) if LLM_SCRIPT else None
+    if mode == "fake":
+        if scripted is None:
+            raise ValueError("LLM_MODE=fake needs LLM_SCRIPT=module:function")
+        return scripted
+
+    logger.info("Replaying LLM responses from %s", RECORDINGS_DIR)
+    return ReplayModel(ResponseStore(RECORDINGS_DIR, model_name), scripted, LATENCY_MS, TOKENS_PER_S)
@@ -1,107 +1,267 @@
+from utils.attendance import AttendanceSheet
+from functools import lru_cache
 import re
-from datetime import datetime
 
-def regex_extract(text: str):
+# Employee fields, in priority order
+NAME_PATTERNS = [
+    re.compile(r"Employee\s+Name\s*[:\-]\s*(.+?)(?=\s{2,}|\s+(?:ID|Employee\s+Code|PO)\b|$)", re.I | re.M),
+    re.compile(r"\bName\s*[:\-]\s*(.+?)(?=\s{2,}|\s+(?:ID|Employee\s+Code|PO)\b|$)", re.I | re.M),
+]
+ID_PATTERNS = [
+    re.compile(r"\bID\b\s*#\s*[:\-]?\s*(\w+)", re.I),
+    re.compile(r"\bEmp(?:loyee)?\.?\s*Code\s*[:\-]?\s*(\w+)", re.I),
+    re.compile(r"\bID\b\s*[:\-]?\s*(\w+)", re.I),
+]
+PO_PATTERN = re.compile(r"\bPO\s*#?\s*[:\-]?\s*(\d+)", re.I)
+
+# Grid row types
+REGULAR, OVERTIME, LEAVE, HOLIDAY = "REGULAR", "OVERTIME", "LEAVE", "HOLIDAY"
+
+GRID_ROW = re.compile(
+    r"^\s*(?:"
+    r"(?P<OVERTIME>(?:Holiday|Weekend)\s*(?:OT|Overtime)|Overtime|OT)"
+    r"|(?P<REGULAR>Regular|Reg\.?\s*HR|Normal)"
+    r"|(?P<LEAVE>Leaves?)"
+    r"|(?P<HOLIDAY>Holidays?)"
+    r")\b(?:\s+(?:Hours?|Hrs?)\b)?\.?\s*[:\-]?(?P<values>.*)$",
+    re.I
+)
+
+# Cell markers -> (status, hours); any other cell must be a number of hours
+MARKERS = {
+    "B": ("WORK", 8.0),
+    "L": ("LEAVE", 0.0), "AL": ("LEAVE", 0.0), "SL": ("LEAVE", 0.0), "LEAVE": ("LEAVE", 0.0),
+    "H": ("HOLIDAY", 0.0), "EH": ("HOLIDAY", 0.0), "LH": ("HOLIDAY", 0.0), "HOLIDAY": ("HOLIDAY", 0.0),
+    "OFF": ("OFF", 0.0),
+    "A": ("ABSENT", 0.0), "ABSENT": ("ABSENT", 0.0),
+}
+BLANKS = {"", "-", "--"}
+HOURS = re.compile(r"^\d{1,2}(?:[.,]\d+)?$")
+
+DAY_NUMBER = re.compile(r"\b\d{1,2}\b")
+
+# Leading run of cell tokens of a row, and a cheap pre-check for day header lines
+_CELL = r"(?:\d{1,2}(?:[.,]\d+)?|%s|-{1,2})" % "|".join(sorted(MARKERS, key=len, reverse=True))
+LEADING_CELLS = re.compile(r"\s*((?:%s(?=\s|$)\s*)*)" % _CELL, re.I)
+HEADER_HINT = re.compile(r"(?:\b\d{1,2}\s+){4}\d{1,2}\b")
+
+# A grid row needs at least this many cells (avoids prose like "Leave: 2 days")
+MIN_ROW_CELLS = 2
+
+
+def _next_day(prev, day) -> bool:
+    # Pay periods wrap at the month end, e.g. "... 29 30 1 2 ..."
+    return prev is not None and (day == prev + 1 or (day == 1 and prev >= 28))
+
+
+def header_days(line: str):
     """
-    Fallback regex-based extraction for SABIC timesheets
-    Handles grid-based formats with day columns
+    Longest run of consecutive day numbers (1..31) in a line, e.g. a
+    grid's day header, in column order; the run may wrap from the month
+    end back to 1 (a 26th-25th period).
     """
-    
-    records = []
-    employee_name = None
-    employee_code = None
-    po_number = None
-    
-    # Extract employee name
-    name_patterns = [
-        r"Employee Name\s*[:\-]\s*(.+?)(?:\n|$)",
-        r"EMPLOYEE NAME\s*[:\-]\s*(.+?)(?:\n|$)",
-        r"Name\s*[:\-]\s*(.+?)(?:\n|$)"
-    ]
-    for pattern in name_patterns:
-        match = re.search(pattern, text, re.I)
-        if match:
-            employee_name = match.group(1).strip()
-            break
-    
-    # Extract employee code/ID
-    id_patterns = [
-        r"ID\s*#\s*[:\-]?\s*(\w+)",
-        r"Employee Code\s*[:\-]?\s*(\w+)",
-        r"ID\s*[:\-]?\s*(\w+)"
-    ]
-    for pattern in id_patterns:
-        match = re.search(pattern, text, re.I)
+    best, run, prev = [], [], None
+    for match in DAY_NUMBER.finditer(line):
+        day = int(match.group())
+        if not 1 <= day <= 31:
+            run, prev = [], None
+            continue
+        run = run + [day] if _next_day(prev, day) else [day]
+        prev = day
+        if len(run) > len(best):
+            best = run
+    return best
+
+
+def period_positions(runs):
+    """
+    {day number: period position} for the day headers of a document (runs
+    in page order) that wrap at the month end, e.g. "26 ... 30 1 ... 25":
+    the first header day is position 1 and the days after the wrap follow
+    the month's last day. Payroll reads a sheet's day N as the Nth day of
+    the period, so wrapped headers must be renumbered; None when no header
+    wraps (the day numbers already are positions).
+    """
+    days = [day for run in runs for day in run]
+    month_end = next((prev for prev, day in zip(days, days[1:]) if day == 1 and prev >= 28), None)
+    if month_end is None:
+        return None
+    first = days[0]
+    positions = {day: day - first + 1 for day in range(first, month_end + 1)}
+    positions.update((day, month_end - first + 1 + day) for day in range(1, first))
+    return positions
+
+
+def in_period_order(by_day: dict, runs) -> dict:
+    """by_day re-keyed from header day numbers to period positions (see period_positions)"""
+    positions = period_positions(runs)
+    if positions is None:
+        return by_day
+    return {positions[day]: value for day, value in by_day.items() if day in positions}
+
+
+def row_type(label: str):
+    """Grid row type of a row label (REGULAR, OVERTIME, LEAVE, HOLIDAY) or None"""
+    return _label_type(GRID_ROW.match(label))
+
+
+def _label_type(match):
+    if not match:
+        return None
+    for kind in (OVERTIME, REGULAR, LEAVE, HOLIDAY):
+        if match.group(kind):
+            return kind
+    return None
+
+
+def is_cell(token: str) -> bool:
+    """True if the token is a grid cell value (hours, marker or blank dash)"""
+    token = token.strip().upper()
+    return token in MARKERS or token in BLANKS or bool(HOURS.match(token))
+
+
+def parse_cell(value):
+    """(status, hours) of one grid cell, or None for a blank or unreadable cell"""
+    return _parse_token(str(value if value is not None else ""))
+
+
+@lru_cache(maxsize=4096)
+def _parse_token(token: str):
+    # Grids repeat a handful of distinct tokens, so parse each only once
+    token = token.strip().upper()
+    if token in MARKERS:
+        return MARKERS[token]
+    if HOURS.match(token):
+        return ("WORK", float(token.replace(",", ".")))
+    return None
+
+
+def _cell_for_row(kind: str, cell):
+    """Meaning of a cell in a row of the given type"""
+    if cell is None:
+        return None
+    status, hours = cell
+    if kind == OVERTIME:
+        # Only hours count in an overtime row
+        return ("WORK", hours) if status == "WORK" and hours > 0 else None
+    if kind in (LEAVE, HOLIDAY) and status == "WORK":
+        # A non-zero count in a leave/holiday row marks the day
+        return (kind, 0.0) if hours > 0 else None
+    return cell
+
+
+def _merge(old, new):
+    """Combine two values of the same day (e.g. Regular + Overtime)"""
+    if old is None:
+        return new
+    if "LEAVE" in (old[0], new[0]):
+        # A leave marker takes priority over hours
+        return ("LEAVE", 0.0)
+    if old[0] == "WORK" and new[0] == "WORK":
+        return ("WORK", old[1] + new[1])
+    # Hours on a holiday/off day count as work
+    if new[0] == "WORK" and new[1] > 0:
+        return new
+    if old[0] == "WORK" and old[1] > 0:
+        return old
+    return old if old[0] != "WORK" else new
+
+
+def add_row(by_day: dict, kind: str, days, cells):
+    """Merge one grid row's cells, aligned with days, into by_day {day: (status, hours)}"""
+    for day, value in zip(days, cells):
+        cell = _cell_for_row(kind, _parse_token(value))
+        if cell is not None and 1 <= day <= 31:
+            by_day[day] = _merge(by_day.get(day), cell)
+
+
+def _first_match(patterns, text: str):
+    for pattern in patterns:
+        match = pattern.search(text)
         if match:
-            employee_code = match.group(1).strip()
-            break
-    
-    # Extract PO number
-    po_match = re.search(r"PO\s*#?\s*[:\-]?\s*(\d+)", text, re.I)
-    if po_match:
-        po_number = po_match.group(1)
-    
-    # Find "Regular" or "Reg.HR" row with numbers
-    regular_pattern = r"(?:Regular|Reg\.HR)\s+([\d\sLHOFEAL]+)"
-    regular_match = re.search(regular_pattern, text, re.I)
-    
-    if regular_match:
-        values = regular_match.group(1).split()
-        
-        for day, val in enumerate(values, start=1):
-            val = val.strip()
-            
-            if val.isdigit():
-                records.append({
-                    "day": day,
-                    "hours": int(val),
-                    "status": "WORK"
-                })
-            elif val.upper() in ["L", "AL", "SL"]:
-                records.append({
-                    "day": day,
-                    "hours": 0,
-                    "status": "LEAVE"
-                })
-            elif val.upper() in ["H", "EH"]:
-                records.append({
-                    "day": day,
-                    "hours": 0,
-                    "status": "HOLIDAY"
-                })
-            elif val.upper() == "OFF":
-                records.append({
-                    "day": day,
-                    "hours": 0,
-                    "status": "OFF"
-                })
-    
-    # Check for overtime row
-    ot_pattern = r"(?:Overtime|OT)\s+([\d\s]+)"
-    ot_match = re.search(ot_pattern, text, re.I)
-    
-    if ot_match:
-        ot_values = ot_match.group(1).split()
-        
-        for day, val in enumerate(ot_values, start=1):
-            if val.strip().isdigit():
-                ot_hours = int(val.strip())
-                
-                # Add to existing record or create new
-                existing = next((r for r in records if r["day"] == day), None)
-                if existing:
-                    existing["hours"] += ot_hours
-                else:
-                    records.append({
-                        "day": day,
-                        "hours": ot_hours,
-                        "status": "WORK"
-                    })
-    
-    return {
-        "employee_name": employee_name or "UNKNOWN",
-        "employee_code": employee_code or "",
-        "po_number": po_number or "",
-        "attendance_type": "GRID",
-        "records": records
-    }
\ No newline at end of file
+            return match.group(1).strip()
+    return None
+
+
+def employee_header(text: str, name_patterns=NAME_PATTERNS):
+    """(employee_name, employee_code) found in text; either may be None"""
+    return _first_match(name_patterns, text), _first_match(ID_PATTERNS, text)
+
+
+def parse_grid(text: str):
+    """
+    Single pass over the lines of a grid timesheet.
+
+    Each day header line ("1 2 3 ... 15", or "26 ... 30 1 ... 25") starts
+    a grid whose rows map each cell to the header day of its column.
+    Rows without a header map to days 1..n, and a second Regular row
+    starts a new grid after the previous one's last day. Days of headers
+    that wrap at the month end are returned as period positions (see
+    period_positions), so the 26th of a 26-25 sheet is day 1.
+    Returns ({day: (status, hours)}, aligned), where aligned is False if
+    any row had a different number of cells than its header has days
+    (a totals column, or a cell lost by the text layer), in which case
+    cells may sit on the wrong days.
+    """
+    by_day = {}
+    days = None
+    runs = []
+    has_regular = False
+    aligned = True
+
+    for line in text.splitlines():
+        match = GRID_ROW.match(line)
+        if not match:
+            if HEADER_HINT.search(line):
+                run = header_days(line)
+                if len(run) >= 5:
+                    days, has_regular = run, False
+                    runs.append(run)
+            continue
+
+        cells = LEADING_CELLS.match(match.group("values")).group(1).split()
+        if len(cells) < MIN_ROW_CELLS:
+            continue
+
+        kind = _label_type(match)
+        if kind == REGULAR:
+            if has_regular or days is None:
+                first = (days[-1] + 1) if has_regular and days else 1
+                days = list(range(first, first + len(cells)))
+            has_regular = True
+        elif days is None:
+            days = list(range(1, len(cells) + 1))
+
+        if len(cells) != len(days):
+            aligned = False
+        add_row(by_day, kind, days, cells)
+
+    return in_period_order(by_day, runs), aligned
+
+
+def regex_grid(text: str):
+    """
+    Fast regex-based extraction for SABIC grid timesheets.
+    Handles Regular/Overtime/Leave/Holiday rows, decimal hours and
+    several grids per document (e.g. one per half-month).
+    Returns (AttendanceSheet, aligned) as parse_grid.
+    """
+    by_day, aligned = parse_grid(text)
+    sheet = AttendanceSheet.from_days(
+        by_day,
+        employee_name=_first_match(NAME_PATTERNS, text) or "UNKNOWN",
+        employee_code=_first_match(ID_PATTERNS, text) or "",
+        po_number=_first_match([PO_PATTERN], text) or "",
+        attendance_type="GRID"
+    )
+    return sheet, aligned
+
+
+def regex_sheet(text: str) -> AttendanceSheet:
+    """regex_grid's sheet, whether or not its rows matched their headers"""
+    return regex_grid(text)[0]
+
+
+def regex_extract(text: str):
+    """regex_sheet as an extraction result dict"""
+    return regex_sheet(text).to_dict()
@@ -0,0 +1,64 @@
+from agents.classifier import classify_document
+from agents.regex import employee_header, NAME_PATTERNS
+
+# Only the top of a page is searched for the employee header, so
+# signatures and approver names in the footer don't start a new segment
+HEADER_LINES = 15
+
+# A bare "Name:" also matches approvers ("Supervisor Name: ..."), so only
+# an "Employee Name" label or an ID identifies a page's employee
+SEGMENT_NAME_PATTERNS = NAME_PATTERNS[:1]
+
+
+def page_employee(page_text: str):
+    """
+    (name, code) from the page header, normalized for comparison; None if
+    absent or if the page isn't a timesheet itself (a cover or approval
+    page naming someone doesn't start a new employee)
+    """
+    head = "\n".join(page_text.splitlines()[:HEADER_LINES])
+    name, code = employee_header(head, SEGMENT_NAME_PATTERNS)
+    if not name and not code:
+        return None
+    if classify_document(page_text)[0] == "UNKNOWN":
+        return None
+    return (name or "").casefold().strip() or None, (code or "").upper().strip() or None
+
+
+def same_employee(a, b) -> bool:
+    """Compare by code when both pages have one, else by name"""
+    if a[1] and b[1]:
+        return a[1] == b[1]
+    if a[0] and b[0]:
+        return a[0] == b[0]
+    return True
+
+
+def iter_segments(page_texts):
+    """
+    Split a stream of page texts into one segment per employee.
+
+    A timesheet page whose header names a different employee than the
+    current segment starts a new segment; pages without a header
+    (continuations, scans, approval pages) stay with the current one.
+    Yields (first_page, page_texts) with 0-based page numbers as soon as
+    each segment is complete, so segments can be extracted while later
+    pages are still being read.
+    """
+    start, pages, current = 0, [], None
+
+    for page_number, text in enumerate(page_texts):
+        employee = page_employee(text)
+        if employee is not None:
+            if current is not None and not same_employee(current, employee):
+                yield start, pages
+                start, pages, current = page_number, [], employee
+            elif current is None:
+                current = employee
+            else:
+                # Keep whichever of name/code the segment was still missing
+                current = (current[0] or employee[0], current[1] or employee[1])
+        pages.append(text)
+
+    if pages:
+        yield start, pages
@@ -0,0 +1,87 @@
+import json
+
+
+class StreamAborted(Exception):
+    """Raised when a streamed response clearly is not the JSON we asked for"""
+
+
+class RecordStreamParser:
+    """
+    Incremental JSON scanner for streamed extraction responses.
+
+    feed() takes each chunk as it arrives and returns the day records
+    ({"day", "hours", "status"} objects inside an array) completed by
+    that chunk. Markdown code fences around the JSON are skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._stack = []          # container chars: "{" or "["
+        self._object_starts = []  # buffer offsets of open objects inside arrays
+        self._in_string = False
+        self._escape = False
+
+    def _find_start(self) -> bool:
+        """Skip fences/preamble whitespace; raise if the response is not JSON"""
+        # Drop leading whitespace first, so the fence line below is the fence's own
+        self.buffer = self.buffer.lstrip()
+        if self.buffer.startswith("`"):
+            fence_end = self.buffer.find("\n")
+            if fence_end == -1:
+                return False
+            self.buffer = self.buffer[fence_end + 1:].lstrip()
+
+        if not self.buffer:
+            return False
+
+        # The prompt asks for bare JSON, so any preamble means the answer is off
+        if self.buffer[0] not in "{[":
+            raise StreamAborted(f"response does not start with JSON: {self.buffer[:40]!r}")
+
+        self._pos = 0
+        self._started = True
+        return True
+
+    def feed(self, chunk: str):
+        self.buffer += chunk
+        if not self._started and not self._find_start():
+            return []
+
+        records = []
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._stack and self._stack[-1] == "[":
+                    self._object_starts.append((len(self._stack), i))
+                self._stack.append(ch)
+            elif ch in "}]":
+                if not self._stack:
+                    raise StreamAborted("unbalanced JSON in response")
+                self._stack.pop()
+                depth = len(self._stack)
+                if ch == "}" and self._object_starts and self._object_starts[-1][0] == depth:
+                    _, start = self._object_starts.pop()
+                    try:
+                        obj = json.loads(buf[start:i + 1])
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(obj, dict) and "day" in obj:
+                        records.append(obj)
+
+        self._pos = len(buf)
+        return records
@@ -0,0 +1,95 @@
+from agents.classifier import REGULAR_ROW
+from agents.regex import (
+    row_type, add_row, employee_header, in_period_order, HEADER_HINT, MIN_ROW_CELLS, PO_PATTERN
+)
+from utils.attendance import AttendanceSheet
+
+# A day header row needs at least this many day columns
+MIN_DAY_COLUMNS = 5
+
+
+def is_grid_page(text: str) -> bool:
+    """Cheap text check deciding whether a page is worth running the table finder on"""
+    return bool(REGULAR_ROW.search(text) and HEADER_HINT.search(text))
+
+
+def _day_of(cell: str):
+    # Header cells may carry the weekday below the number ("1\nWed")
+    token = cell.split()[0] if cell.split() else ""
+    return int(token) if token.isdigit() and 1 <= int(token) <= 31 else None
+
+
+def header_columns(cells):
+    """{column index: day} if the row is a day header (consecutive days, may wrap to 1), else {}"""
+    columns = {i: day for i, day in enumerate(map(_day_of, cells)) if day is not None}
+    days = list(columns.values())
+    if len(days) < MIN_DAY_COLUMNS:
+        return {}
+    for prev, cur in zip(days, days[1:]):
+        if cur != prev + 1 and not (cur == 1 and prev >= 28):
+            return {}
+    return columns
+
+
+def grid_from_tables(tables):
+    """
+    {day: (status, hours)} from pdfplumber tables (rows of cell strings).
+
+    Each day header row maps its columns to days; the Regular, Overtime,
+    Leave and Holiday rows below it are read cell by cell from those
+    columns, so blank cells keep their day (unlike whitespace-split text).
+    Headers that wrap at the month end give period positions, as in
+    parse_grid.
+    """
+    by_day = {}
+    runs = []
+    for table in tables:
+        columns = {}
+        for row in table:
+            cells = [(cell or "").strip() for cell in row]
+            label = next((cell for cell in cells if cell), "")
+            kind = row_type(label)
+            if kind is None:
+                header = header_columns(cells)
+                if header:
+                    columns = header
+                    runs.append(list(header.values()))
+                continue
+            if not columns:
+                continue
+
+            values = [cells[i] if i < len(cells) else "" for i in columns]
+            if sum(1 for value in values if value) >= MIN_ROW_CELLS:
+                add_row(by_day, kind, list(columns.values()), values)
+    return in_period_order(by_day, runs)
+
+
+def table_sheet(text: str, page_tables):
+    """
+    AttendanceSheet from the tables of a document's pages (None for
+    pages without tables), like regex_sheet; None when no grid table
+    was found.
+    """
+    tables = [table for tables in page_tables if tables for table in tables]
+    if not tables:
+        return None
+
+    by_day = grid_from_tables(tables)
+    if not by_day:
+        return None
+
+    name, code = employee_header(text)
+    po = PO_PATTERN.search(text)
+    return AttendanceSheet.from_days(
+        by_day,
+        employee_name=name or "UNKNOWN",
+        employee_code=code or "",
+        po_number=po.group(1) if po else "",
+        attendance_type="GRID"
+    )
+
+
+def table_extract(text: str, page_tables):
+    """table_sheet as an extraction result dict, or None"""
+    sheet = table_sheet(text, page_tables)
+    return sheet.to_dict() if sheet is not None else None
@@ -0,0 +1,43 @@
+"""
+Scripted responder for the fake LLM transport, so the pipeline can be
+benchmarked without network access or API quota. It answers extraction
+prompts with the regex parser (grid documents) or a date-line parser
+(date-based documents).
+
+    LLM_MODE=fake LLM_SCRIPT=benchmarks.fake_llm:answer python cli.py ...
+"""
+from agents.regex import regex_extract
+import json
+import re
+
+DATE_LINE = re.compile(r"^\s*(\d{1,2})[/\-.]\d{1,2}[/\-.]\d{2,4}\s+([A-Za-z]+)\s+(\d+(?:\.\d+)?)", re.M)
+DOCUMENT = re.compile(r"^=== DOCUMENT (\S+) ===$", re.M)
+
+
+def _extract(text: str) -> dict:
+    result = regex_extract(text)
+    records = result["records"]
+    if not records:
+        records = [
+            {"day": int(day), "hours": float(hours), "status": status.upper()}
+            for day, status, hours in DATE_LINE.findall(text)
+        ]
+    return {
+        "employee_name": result["employee_name"],
+        "employee_code": result["employee_code"],
+        "records": records,
+    }
+
+
+def answer(prompt: str) -> str:
+    """JSON answer to an extraction prompt (single or batched)"""
+    if "**DOCUMENTS TO EXTRACT FROM:**" in prompt:
+        documents = prompt.split("**DOCUMENTS TO EXTRACT FROM:**")[1].split("**START EXTRACTION NOW:**")[0]
+        parts = DOCUMENT.split(documents)[1:]
+        return json.dumps([
+            {"doc_id": doc_id, **_extract(text)}
+            for doc_id, text in zip(parts[::2], parts[1::2])
+        ])
+
+    text = prompt.split("**TEXT TO EXTRACT FROM:**")[-1].split("**START EXTRACTION NOW:**")[0]
+    return json.dumps(_extract(text))
@@ -0,0 +1,233 @@
+"""
+End-to-end benchmark: synthetic timesheets -> extract_many -> payroll ->
+workbook, with a local stand-in for the Groq model.
+
+Examples:
+    python -m benchmarks.run --count 100
+    python -m benchmarks.run --count 1000 --kinds grid,date --workers 8 --llm-latency 800
+    python -m benchmarks.run --count 500 --save-baseline      # record a baseline
+    python -m benchmarks.run --count 500                      # compare against it
+    python -m benchmarks.run --count 50 --llm record          # save live Groq responses
+    python -m benchmarks.run --count 50 --llm replay          # rerun them offline
+
+Results are written to --output; if the baseline file exists, every
+metric is printed next to its baseline value.
+"""
+from datetime import date
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+PERIOD_START = date(2025, 10, 1)
+PERIOD_END = date(2025, 10, 31)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Attendance pipeline benchmark")
+    parser.add_argument("--count", type=int, default=100, help="Number of synthetic PDFs (10-5000)")
+    parser.add_argument("--kinds", default="grid,date,scanned", help="Comma-separated kinds: grid, date, scanned, bundle")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel extractions")
+    parser.add_argument("--batch-llm", action="store_true", help="Use the batched LLM mode")
+    parser.add_argument("--llm", choices=["fake", "replay", "record"], default="fake",
+                        help="fake: scripted local model; replay: recorded responses (scripted on a miss); "
+                             "record: live Groq, saving responses")
+    parser.add_argument("--recordings", default=os.path.join(os.path.dirname(__file__), "recordings"),
+                        help="Recorded responses for --llm replay/record")
+    parser.add_argument("--llm-latency", type=float, default=0, help="Simulated LLM latency per request (ms)")
+    parser.add_argument("--tokens-per-s", type=float, default=None, help="Simulated LLM output speed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="Keep the extraction cache enabled")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also save this run as the baseline")
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its children (OCR pool)"""
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def accuracy(files, outcomes):
+    """Share of days whose extracted hours and status match the ground truth, per kind"""
+    from agents.extractor import employee_results
+
+    per_kind = {}
+    for info, (result, error) in zip(files, outcomes):
+        stats = per_kind.setdefault(info["kind"], {"files": 0, "failed": 0, "days": 0, "days_correct": 0})
+        stats["files"] += 1
+        employees = employee_results(result) if not error else []
+        if len(employees) != len(info["employees"]) or not all(e.get("records") for e in employees):
+            stats["failed"] += 1
+            continue
+
+        for employee, expected in zip(employees, info["employees"]):
+            extracted = {r["day"]: r for r in employee["records"]}
+            for day, (hours, status) in expected["truth"].items():
+                stats["days"] += 1
+                rec = extracted.get(day)
+                # Non-work days carry no hours, so only the status has to match there
+                if rec and rec["status"] == status and float(rec["hours"]) == float(hours if status == "WORK" else 0):
+                    stats["days_correct"] += 1
+
+    for stats in per_kind.values():
+        stats["day_accuracy"] = round(stats["days_correct"] / stats["days"], 4) if stats["days"] else 0.0
+    return per_kind
+
+
+def check_payroll_parity(results, calendar):
+    """Vectorized payroll must match the per-employee loop exactly"""
+    from excel.excel_writer import compute_employee_row, ROW_FIELDS
+    from excel.payroll import compute_rows_vectorized
+
+    vectorized = compute_rows_vectorized(results, PERIOD_START, PERIOD_END, calendar=calendar)
+    mismatches = 0
+    for result, row in zip(results, vectorized):
+        expected = compute_employee_row(result, PERIOD_START, PERIOD_END, calendar=calendar)
+        if any(abs(expected[f] - row[f]) > 1e-9 for f in ROW_FIELDS[5:]):
+            mismatches += 1
+    return mismatches
+
+
+def compare(current, baseline):
+    """Print current metrics next to the baseline with the relative change"""
+    def flatten(d, prefix=""):
+        for key, value in d.items():
+            if isinstance(value, dict):
+                yield from flatten(value, f"{prefix}{key}.")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}{key}", value
+
+    base = dict(flatten(baseline["metrics"]))
+    print(f"\n{'metric':45s} {'baseline':>12s} {'current':>12s} {'change':>9s}")
+    for key, value in flatten(current["metrics"]):
+        if key not in base:
+            continue
+        old = base[key]
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:45s} {old:12.4f} {value:12.4f} {change:>9s}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.cache:
+        # Must be set before the pipeline modules read their configuration
+        os.environ["EXTRACTION_CACHE"] = "0"
+
+    from agents.extractor import employee_results, extract_many
+    from agents.llm_client import MODEL_NAME, groq_client, set_llm
+    from agents.llm_transport import RecordingModel, ReplayModel, ResponseStore, ScriptedModel
+    from benchmarks.fake_llm import answer
+    from benchmarks.synthetic import generate
+    from excel.excel_writer import save_consolidated
+    from excel.payroll import compute_rows_vectorized
+    from utils.dates import PeriodCalendar
+    from utils.metrics import configure_logging, get_metrics, stage
+    import openpyxl
+
+    configure_logging(os.getenv("LOG_LEVEL", "WARNING"))
+    kinds = tuple(k.strip() for k in args.kinds.split(",") if k.strip())
+    model = ScriptedModel(answer, latency_ms=args.llm_latency, tokens_per_s=args.tokens_per_s)
+    if args.llm == "replay":
+        store = ResponseStore(args.recordings, MODEL_NAME)
+        model = ReplayModel(store, model, latency_ms=args.llm_latency, tokens_per_s=args.tokens_per_s)
+    elif args.llm == "record":
+        model = RecordingModel(groq_client(), ResponseStore(args.recordings, MODEL_NAME))
+    set_llm(model)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Generating {args.count} synthetic PDF(s) ({', '.join(kinds)})...")
+        started = time.perf_counter()
+        files = generate(workdir, args.count, kinds=kinds, seed=args.seed)
+        generate_s = time.perf_counter() - started
+
+        template = os.path.join(workdir, "template.xlsx")
+        wb = openpyxl.Workbook()
+        wb.active.append(["Employee Name", "Employee Code", "Flag", "Start", "End", "Normal Days",
+                          "Weekday OT", "Weekend OT", "Holiday OT", "Absent Days", "Shortfall"])
+        wb.save(template)
+
+        metrics = get_metrics()
+        metrics.reset()
+        calendar = PeriodCalendar(PERIOD_START, PERIOD_END, [])
+
+        print(f"Extracting with {args.workers} worker(s)...")
+        started = time.perf_counter()
+        outcomes = extract_many([info["path"] for info in files], max_workers=args.workers, batch_llm=args.batch_llm)
+        extract_s = time.perf_counter() - started
+
+        results = [
+            employee for result, error in outcomes if not error
+            for employee in employee_results(result) if employee.get("records")
+        ]
+        started = time.perf_counter()
+        with stage("payroll"):
+            rows = compute_rows_vectorized(results, PERIOD_START, PERIOD_END, calendar=calendar)
+        with stage("excel_write"):
+            save_consolidated(template, rows, os.path.join(workdir, "out.xlsx"))
+        write_s = time.perf_counter() - started
+
+    rss_self, rss_children = peak_rss_mb()
+    total_s = extract_s + write_s
+    current = {
+        "config": {
+            "count": args.count,
+            "kinds": list(kinds),
+            "workers": args.workers,
+            "llm": args.llm,
+            "batch_llm": args.batch_llm,
+            "llm_latency_ms": args.llm_latency,
+            "tokens_per_s": args.tokens_per_s,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "metrics": {
+            "generate_s": round(generate_s, 3),
+            "extract_s": round(extract_s, 3),
+            "write_s": round(write_s, 3),
+            "total_s": round(total_s, 3),
+            "pdfs_per_s": round(args.count / total_s, 2) if total_s else 0.0,
+            "llm_calls": getattr(model, "calls", None),
+            "peak_rss_mb": rss_self,
+            "peak_rss_children_mb": rss_children,
+            "stages": metrics.summary(),
+        },
+        "accuracy": accuracy(files, outcomes),
+        "payroll_parity_mismatches": check_payroll_parity(results, calendar),
+    }
+
+    print(json.dumps({k: current[k] for k in ("metrics", "accuracy", "payroll_parity_mismatches")}, indent=2))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["config"] != current["config"]:
+            print("⚠️ Baseline was recorded with a different configuration")
+        compare(current, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
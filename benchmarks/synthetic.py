@@ -0,0 +1,245 @@
+"""
+Synthetic timesheet PDFs with known ground truth.
+
+Three kinds are generated:
+- grid:    SABIC-style text PDF with day-number header, Regular and Overtime rows
+           (randomly as one 1-31 grid, two half-month grids or one 26-25
+           period grid)
+- date:    date-based text PDF, one line per day
+- scanned: the grid layout rendered to an image-only PDF (needs OCR)
+- bundle:  several employees' grid timesheets in one multi-page PDF
+           (some employees span two pages)
+- table:   ruled grid table, one cell per day, with blank cells for
+           absent days (which whitespace-split text can't place)
+"""
+from PIL import Image, ImageDraw, ImageFont
+import random
+
+KINDS = ("grid", "date", "scanned", "bundle", "table")
+
+# Employees per bundle PDF
+BUNDLE_EMPLOYEES = 8
+
+FIRST_NAMES = ["Ahmed", "Priya", "John", "Fatima", "Rahul", "Maria", "Omar", "Anita", "Khalid", "Sara"]
+LAST_NAMES = ["Al-Harbi", "Sharma", "Smith", "Khan", "Verma", "Garcia", "Hassan", "Nair", "Qureshi", "Lee"]
+
+# Letterhead / footer noise that real exports carry around the grid
+LETTERHEAD = [
+    "SABIC - Saudi Basic Industries Corporation",
+    "Contractor Services Department - Jubail Industrial City",
+    "CONTRACTOR MONTHLY TIMESHEET",
+]
+FOOTER = [
+    "I certify that the hours shown above are correct.",
+    "Employee Signature: ____________    Supervisor Signature: ____________",
+    "Approved by: ____________    Date: ____________",
+    "This document is system generated. Page 1 of 1",
+]
+
+
+def make_truth(rng: random.Random, blanks=False):
+    """
+    Random month of attendance: day -> (hours, status, regular token, overtime hours).
+    With blanks, some days are ABSENT with empty cells.
+    """
+    truth = {}
+    for day in range(1, 32):
+        roll = rng.random()
+        if blanks and roll < 0.06:
+            truth[day] = (0, "ABSENT", "", "")
+        elif roll < 0.08:
+            truth[day] = (0, "LEAVE", "L", 0)
+        elif roll < 0.12:
+            truth[day] = (0, "HOLIDAY", "H", 0)
+        elif roll < 0.25:
+            truth[day] = (0, "OFF", "OFF", 0)
+        else:
+            regular = rng.choice(["8", "8", "B", "4", "6"])
+            overtime = rng.choice([0, 0, 0, 2, 4])
+            hours = (8 if regular == "B" else int(regular)) + overtime
+            truth[day] = (hours, "WORK", regular, overtime)
+    return truth
+
+
+def grid_lines(name, code, truth, rng: random.Random):
+    lines = LETTERHEAD + [
+        f"Employee Name: {name}",
+        f"ID # {code}",
+        f"PO # {rng.randint(4500000000, 4599999999)}",
+        "Month: October 2025",
+    ]
+    roll = rng.random()
+    if roll < 0.35:
+        grids = [(range(1, 32), range(1, 32))]
+    elif roll < 0.7:
+        grids = [(range(1, 16), range(1, 16)), (range(16, 32), range(16, 32))]
+    else:
+        # One 26th-25th pay period grid whose header wraps at the month end.
+        # Extraction numbers days by period position (the 26th is day 1),
+        # as the truth does; the period has 30 days, so day 31 leaves it
+        grids = [(list(range(26, 31)) + list(range(1, 26)), range(1, 31))]
+        truth.pop(31)
+    for labels, days in grids:
+        lines.append("Day " + " ".join(str(d) for d in labels))
+        lines.append("Regular " + " ".join(truth[d][2] for d in days))
+        lines.append("Overtime " + " ".join(str(truth[d][3]) for d in days))
+    total = sum(hours for hours, _, _, _ in truth.values())
+    lines.append(f"Total Hours: {total}")
+    return lines + FOOTER
+
+
+def date_lines(name, code, truth):
+    lines = LETTERHEAD + [
+        f"Employee Name: {name}",
+        f"Employee Code: {code}",
+        "Date        Status     Hours",
+    ]
+    for day, (hours, status, _, _) in truth.items():
+        lines.append(f"{day:02d}/10/2025  {status:<9s}  {hours}")
+    return lines + FOOTER
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_content(lines, font_size=7, top=810):
+    """Page content stream with one text line per entry (Helvetica)"""
+    body = "".join(f"({_pdf_escape(line)}) Tj T* " for line in lines)
+    return f"BT /F1 {font_size} Tf {font_size + 3} TL 30 {top} Td {body}ET"
+
+
+def table_content(name, code, truth, rng: random.Random):
+    """Page content stream: header lines, a ruled Day/Regular/Overtime grid, then the footer"""
+    header = LETTERHEAD + [
+        f"Employee Name: {name}",
+        f"ID # {code}",
+        f"PO # {rng.randint(4500000000, 4599999999)}",
+        "Month: October 2025",
+    ]
+    ops = [text_content(header)]
+
+    rows = [
+        ["Day"] + [str(d) for d in truth],
+        ["Regular"] + [truth[d][2] for d in truth],
+        ["Overtime"] + [str(truth[d][3]) for d in truth],
+    ]
+    label_width, cell_width, row_height = 44, 16.5, 14
+    y = 810 - 10 * (len(header) + 1)
+    for row in rows:
+        y -= row_height
+        x = 30
+        for i, value in enumerate(row):
+            width = label_width if i == 0 else cell_width
+            ops.append(f"{x:.1f} {y} {width} {row_height} re S")
+            if value:
+                ops.append(f"BT /F1 6 Tf {x + 2:.1f} {y + 4} Td ({_pdf_escape(value)}) Tj ET")
+            x += width
+
+    ops.append(text_content(FOOTER, top=y - 20))
+    return "\n".join(ops)
+
+
+def write_text_pdf(path, lines, font_size=7):
+    """Minimal PDF with one text line per entry; a list of line lists gives one page each"""
+    pages = lines if lines and isinstance(lines[0], list) else [lines]
+    write_pdf(path, [text_content(page_lines, font_size) for page_lines in pages])
+
+
+def write_pdf(path, contents):
+    """Minimal PDF with one page per content stream (Helvetica as /F1)"""
+    # 1: catalog, 2: pages, 3: font, then a page and a content stream per page
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(contents)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(contents)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(contents):
+        content = text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_scanned_pdf(path, lines, dpi=200):
+    """Image-only PDF: the lines drawn on an A4 page bitmap, no text layer"""
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=dpi // 8)
+    except TypeError:
+        font = ImageFont.load_default()
+
+    y = dpi // 2
+    for line in lines:
+        draw.text((dpi // 3, y), line, fill=0, font=font)
+        y += dpi // 6
+    img.save(path, "PDF", resolution=dpi)
+
+
+def generate(directory, count, kinds=KINDS, seed=0):
+    """
+    Write count PDFs into directory, cycling through kinds.
+
+    Returns a list of {"path", "kind", "employees"}, one per file, where
+    employees lists {"employee_name", "employee_code", "truth"} in page
+    order and truth maps day -> (hours, status).
+    """
+    rng = random.Random(seed)
+    files = []
+
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        path = f"{directory}/{kind}_{i:05d}.pdf"
+        employees = []
+        for j in range(BUNDLE_EMPLOYEES if kind == "bundle" else 1):
+            employees.append({
+                "employee_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "employee_code": str(100000 + i * BUNDLE_EMPLOYEES + j),
+                "truth": make_truth(rng, blanks=kind == "table"),
+            })
+
+        first = employees[0]
+        if kind == "grid":
+            write_text_pdf(path, grid_lines(first["employee_name"], first["employee_code"], first["truth"], rng))
+        elif kind == "date":
+            write_text_pdf(path, date_lines(first["employee_name"], first["employee_code"], first["truth"]))
+        elif kind == "table":
+            write_pdf(path, [table_content(first["employee_name"], first["employee_code"], first["truth"], rng)])
+        elif kind == "scanned":
+            write_scanned_pdf(path, grid_lines(first["employee_name"], first["employee_code"], first["truth"], rng))
+        else:
+            pages = []
+            for employee in employees:
+                lines = grid_lines(employee["employee_name"], employee["employee_code"], employee["truth"], rng)
+                if rng.random() < 0.3:
+                    # Footer on a continuation page without the employee header
+                    pages += [lines[:-len(FOOTER)], FOOTER]
+                else:
+                    pages.append(lines)
+            write_text_pdf(path, pages)
+
+        for employee in employees:
+            employee["truth"] = {day: (hours, status) for day, (hours, status, _, _) in employee["truth"].items()}
+        files.append({"path": path, "kind": kind, "employees": employees})
+
+    return files
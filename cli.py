@@ -0,0 +1,214 @@
+"""
+Headless batch runner for unattended month-end consolidation.
+
+Example:
+    python cli.py --template template.xlsx --pdfs "timesheets/*.pdf" \
+        --start 2025-09-26 --end 2025-10-25 --holidays holidays.csv \
+        --workers 8 --output consolidated.xlsx
+
+    # After a crash or Groq outage, continue where the run stopped
+    python cli.py ... --output consolidated.xlsx --resume
+"""
+from agents.extractor import extract_many, employee_results, DEFAULT_WORKERS
+from agents.llm_client import scheduler_stats
+from excel.excel_writer import save_consolidated
+from excel.payroll import compute_rows_vectorized
+from utils.cache import get_cache, get_ocr_cache, file_digest
+from utils.dates import load_holidays, PeriodCalendar, DEFAULT_HOLIDAYS_FILE
+from utils.metrics import configure_logging, get_metrics, stage
+from utils.memory import MemoryGate, MEMORY_LIMIT_MB
+from utils.journal import Journal
+from datetime import date, datetime
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+
+def find_pdfs(patterns):
+    """Expand directories and glob patterns into a sorted, de-duplicated PDF list"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.pdf")
+        paths.extend(glob.glob(pattern, recursive=True))
+    return sorted(set(p for p in paths if p.lower().endswith(".pdf")))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Consolidate attendance PDFs into the COMM-IT template")
+    parser.add_argument("--template", required=True, help="COMM-IT template .xlsx")
+    parser.add_argument("--pdfs", required=True, nargs="+", help="PDF directory or glob pattern(s)")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="Period start (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Period end (YYYY-MM-DD)")
+    parser.add_argument("--holidays", default=os.getenv("HOLIDAYS_FILE", DEFAULT_HOLIDAYS_FILE),
+                        help="Holiday file, one YYYY-MM-DD[,name] per line (default: the app's holidays.csv)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel extractions")
+    parser.add_argument("--memory-limit-mb", type=float, default=MEMORY_LIMIT_MB,
+                        help="Hold back new PDFs above this resident memory (0 = no limit)")
+    parser.add_argument("--batch-llm", action="store_true", help="Pack short timesheets into shared LLM requests")
+    parser.add_argument("--stream-excel", action="store_true", default=None,
+                        help="Write the workbook in write-only mode (flat memory; keeps only the template "
+                             "header, styles and column widths). Default: EXCEL_STREAMING")
+    parser.add_argument("--output", help="Output workbook (default: COMM_IT_Attendance_<start>_<end>.xlsx)")
+    parser.add_argument("--summary", help="Run summary JSON (default: next to the output workbook)")
+    parser.add_argument("--journal", help="Checkpoint journal of per-PDF outcomes (default: next to the output workbook)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip PDFs the journal already holds a result for, retry failed and pending ones")
+    parser.add_argument("--metrics-prom", default=os.getenv("METRICS_TEXTFILE"), help="Prometheus textfile for stage timings")
+    parser.add_argument("--log-level", help="Logging level (default: LOG_LEVEL or INFO)")
+    return parser.parse_args(argv)
+
+
+def consolidate(pdf_paths, template, output, start, end, calendar, workers=DEFAULT_WORKERS,
+                batch_llm=False, memory_limit_mb=MEMORY_LIMIT_MB, on_done=None, journal=None,
+                stream_excel=None):
+    """
+    Extract pdf_paths, compute payroll rows and write them into a copy of
+    template at output. Returns the run summary dict ("output" is None
+    when no employee had records, in which case nothing is written).
+
+    With a Journal, every PDF's outcome is checkpointed as it finishes and
+    PDFs the journal already holds a result for are not extracted again;
+    failed and pending ones are. Payroll rows and the workbook are always
+    rebuilt from the full set of results.
+    """
+    started = time.time()
+
+    outcomes = [None] * len(pdf_paths)
+    digests = [file_digest(path) for path in pdf_paths] if journal else None
+    if journal:
+        for idx, digest in enumerate(digests):
+            result = journal.completed(digest)
+            if result is not None:
+                outcomes[idx] = (result, None)
+                if on_done:
+                    on_done(idx, result, None)
+    pending = [idx for idx, outcome in enumerate(outcomes) if outcome is None]
+
+    def on_extracted(n, result, error):
+        idx = pending[n]
+        if journal:
+            journal.record(pdf_paths[idx], digests[idx], result, error)
+        if on_done:
+            on_done(idx, result, error)
+
+    # PDFs are read page by page from disk, never loaded whole
+    memory_gate = MemoryGate(memory_limit_mb)
+    extracted = extract_many(
+        [pdf_paths[idx] for idx in pending], max_workers=workers, on_done=on_extracted,
+        batch_llm=batch_llm, memory_gate=memory_gate
+    )
+    for idx, outcome in zip(pending, extracted):
+        outcomes[idx] = outcome
+
+    # Write rows in input order so the workbook is deterministic
+    results = []
+    files = []
+    for path, (result, error) in zip(pdf_paths, outcomes):
+        if error:
+            files.append({"file": path, "status": "error", "error": str(error)})
+            continue
+
+        # A multi-employee bundle gives one entry per employee
+        for employee in employee_results(result) or [None]:
+            entry = {"file": path}
+            if employee and employee.get("pages"):
+                entry["pages"] = employee["pages"]
+            if employee and employee.get("error"):
+                entry.update(status="error", error=employee["error"])
+            elif not employee or not employee.get("records"):
+                entry.update(status="empty", employee_name=(employee or {}).get("employee_name"))
+            else:
+                results.append(employee)
+                entry.update(
+                    status="ok",
+                    employee_name=employee.get("employee_name"),
+                    employee_code=employee.get("employee_code"),
+                    records=len(employee["records"]),
+                )
+            files.append(entry)
+
+    # Payroll categories for every employee in one vectorized pass
+    with stage("payroll"):
+        rows = compute_rows_vectorized(results, start, end, calendar=calendar)
+    ok_files = [f for f in files if f["status"] == "ok"]
+    for entry, row in zip(ok_files, rows):
+        entry["total_work_hours"] = row["total_work_hours"]
+
+    written = len(rows)
+    if written:
+        with stage("excel_write"):
+            save_consolidated(template, rows, output, streaming=stream_excel)
+
+    cache = get_cache()
+    ocr_cache = get_ocr_cache()
+    return {
+        "started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "duration_s": round(time.time() - started, 2),
+        "period": {"start": str(start), "end": str(end)},
+        "template": template,
+        "output": output if written else None,
+        "totals": {
+            "files": len(pdf_paths),
+            "ok": written,
+            "empty": sum(1 for f in files if f["status"] == "empty"),
+            "error": sum(1 for f in files if f["status"] == "error"),
+            "resumed": len(pdf_paths) - len(pending),
+        },
+        "cache": cache.stats() if cache else None,
+        "ocr_cache": ocr_cache.stats() if ocr_cache else None,
+        "llm": scheduler_stats(),
+        "memory": memory_gate.stats(),
+        "stages": get_metrics().summary(),
+        "files": files,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.log_level)
+    output = args.output or f"COMM_IT_Attendance_{args.start}_{args.end}.xlsx"
+    summary_path = args.summary or os.path.splitext(output)[0] + "_summary.json"
+    journal_path = args.journal or os.path.splitext(output)[0] + "_journal.jsonl"
+    calendar = PeriodCalendar(args.start, args.end, load_holidays(args.holidays))
+
+    pdf_paths = find_pdfs(args.pdfs)
+    if not pdf_paths:
+        print("❌ No PDFs found", file=sys.stderr)
+        return 1
+
+    # Without --resume an old journal is discarded and the run starts over
+    journal = Journal(journal_path, resume=args.resume)
+    print(f"Processing {len(pdf_paths)} PDF(s) with {args.workers} worker(s), journal {journal_path}")
+
+    def on_done(idx, result, error):
+        status = "❌" if error else "✅"
+        print(f"{status} [{idx + 1}/{len(pdf_paths)}] {os.path.basename(pdf_paths[idx])}")
+
+    summary = consolidate(
+        pdf_paths, args.template, output, args.start, args.end, calendar,
+        workers=args.workers, batch_llm=args.batch_llm,
+        memory_limit_mb=args.memory_limit_mb, on_done=on_done, journal=journal,
+        stream_excel=args.stream_excel
+    )
+    if summary["totals"]["resumed"]:
+        print(f"♻️ Resumed {summary['totals']['resumed']} PDF(s) from the journal")
+    written = summary["totals"]["ok"]
+    if written:
+        print(f"💾 Saved {written} employee(s) to {output}")
+
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"📄 Run summary written to {summary_path}")
+
+    if args.metrics_prom:
+        get_metrics().to_prometheus(args.metrics_prom)
+
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,58 @@
 import openpyxl
-from datetime import datetime, date, timedelta
-from utils.dates import get_day_type
+from openpyxl.cell import WriteOnlyCell
+from copy import copy
+from utils.attendance import as_sheet, DAYS, MISSING, ABSENT, LEAVE, OFF, HOLIDAY, WORK
+from utils.dates import PeriodCalendar
+import logging
+import os
 
-def write_commit_excel(wb, records, start_date, end_date, holidays=None):
+logger = logging.getLogger(__name__)
+
+# Template columns, in order, filled for every employee row
+ROW_FIELDS = [
+    "employee_name", "employee_code", "flag", "start_date", "end_date",
+    "normal_days", "weekday_ot_hours", "weekend_ot_hours", "holiday_ot_hours",
+    "absent_days", "shortfall",
+]
+
+# Write the workbook in write-only mode (flat memory, but only the template's
+# header values, styles and column widths are kept); opt-in, never automatic
+EXCEL_STREAMING = os.getenv("EXCEL_STREAMING", "0") == "1"
+
+
+# Weekday abbreviations indexed by date.weekday(), for the trace output
+DAY_ABBR = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def compute_employee_row(records, start_date, end_date, holidays=None, trace=False, calendar=None):
     """
     Attendance Calculation for Salary Computation.
     
     CRITICAL: This function ensures 100% accuracy for salary calculations.
     Every hour is accounted for with clear categorization.
-    """
-    if holidays is None:
-        holidays = []
     
-    ws = wb.active
+    records is an extraction result, as a dict or an AttendanceSheet.
+    Returns a dict with one value per ROW_FIELDS column plus
+    total_work_hours. With trace, every day's categorization and the
+    final breakdown are logged at DEBUG level. Pass a PeriodCalendar shared across
+    employees to avoid rebuilding it per call.
+    """
+    if calendar is None:
+        calendar = PeriodCalendar(start_date, end_date, holidays)
     
-    row = 2
-    while ws.cell(row=row, column=1).value is not None:
-        row += 1
+    # Per-day trace output, only when asked for and DEBUG logging is on
+    trace = trace and logger.isEnabledFor(logging.DEBUG)
+    log = logger.debug if trace else (lambda *args, **kwargs: None)
     
-    print(f"\n{'='*80}")
-    print(f"Processing: {records.get('employee_name')}")
-    print(f"{'='*80}")
+    # Days by day number, as hours and status code arrays
+    sheet = as_sheet(records)
     
-    # Map days by day number
-    day_records = {}
-    for rec in records.get("records", []):
-        day = rec.get("day")
-        if day and 1 <= day <= 31:
-            day_records[day] = rec
+    log(f"\n{'='*80}")
+    log(f"Processing: {sheet.employee_name}")
+    log(f"{'='*80}")
     
     # Get total days in period
-    total_days = (end_date - start_date).days + 1
+    total_days = calendar.total_days
     
     # ========== CLEAR CATEGORY COUNTERS ==========
     normal_days = 0.0              # Full 8-hour weekday work days
@@ -45,56 +67,57 @@ def write_commit_excel(wb, records, start_date, end_date, holidays=None):
     
     # ========== PROCESS EACH DAY ==========
     for day_num in range(1, total_days + 1):
-        current_date = start_date + timedelta(days=day_num - 1)
-        day_type = get_day_type(current_date, holidays)
+        day_type = calendar.day_type(day_num)
+        day_name = DAY_ABBR[calendar.weekdays[day_num - 1]]
         
-        if day_num in day_records:
-            rec = day_records[day_num]
-            status = rec.get("status", "ABSENT").upper().strip()
-            hours = float(rec.get("hours", 0))
+        code = sheet.status[day_num - 1] if day_num <= DAYS else MISSING
+        
+        if code != MISSING:
+            status = sheet.status_name(day_num)
+            hours = sheet.hours[day_num - 1]
             
             # ---- LEAVE or ABSENT ----
-            if status in ["LEAVE", "L", "AL", "SL", "ABSENT"]:
+            if code in (LEAVE, ABSENT):
                 if day_type == "WEEKDAY":
                     absent_days += 1
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): {status:7s} → ABSENT on WEEKDAY")
+                    log(f"  Day {day_num:2d} ({day_name}): {status:7s} → ABSENT on WEEKDAY")
                 else:
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): {status:7s} → OFF ({day_type})")
+                    log(f"  Day {day_num:2d} ({day_name}): {status:7s} → OFF ({day_type})")
             
             # ---- OFF ----
-            elif status == "OFF":
-                print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): OFF")
+            elif code == OFF:
+                log(f"  Day {day_num:2d} ({day_name}): OFF")
             
             # ---- HOLIDAY (no work) ----
-            elif status == "HOLIDAY":
+            elif code == HOLIDAY:
                 if hours > 0:
                     holiday_ot_hours += hours
                     total_extracted_work_hours += hours
                     actual_work_days += 1
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): HOLIDAY {hours:4.1f}h → HOLIDAY OT {hours:4.1f}h")
+                    log(f"  Day {day_num:2d} ({day_name}): HOLIDAY {hours:4.1f}h → HOLIDAY OT {hours:4.1f}h")
                 else:
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): HOLIDAY (no work)")
+                    log(f"  Day {day_num:2d} ({day_name}): HOLIDAY (no work)")
             
             # ---- WORK ----
-            elif status == "WORK":
+            elif code == WORK:
                 if hours <= 0:
                     if day_type == "WEEKDAY":
                         absent_days += 1
-                        print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK 0.0h → ABSENT on WEEKDAY")
+                        log(f"  Day {day_num:2d} ({day_name}): WORK 0.0h → ABSENT on WEEKDAY")
                 
                 elif day_type == "WEEKEND":
                     # Weekend work: ALL hours count as weekend OT
                     weekend_ot_hours += hours
                     total_extracted_work_hours += hours
                     actual_work_days += 1
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK {hours:4.1f}h WEEKEND → WEEKEND OT {hours:4.1f}h")
+                    log(f"  Day {day_num:2d} ({day_name}): WORK {hours:4.1f}h WEEKEND → WEEKEND OT {hours:4.1f}h")
                 
                 elif day_type == "HOLIDAY":
                     # Holiday work: ALL hours count as holiday OT
                     holiday_ot_hours += hours
                     total_extracted_work_hours += hours
                     actual_work_days += 1
-                    print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK {hours:4.1f}h HOLIDAY → HOLIDAY OT {hours:4.1f}h")
+                    log(f"  Day {day_num:2d} ({day_name}): WORK {hours:4.1f}h HOLIDAY → HOLIDAY OT {hours:4.1f}h")
                 
                 else:
                     # WEEKDAY work - THIS IS WHERE NORMAL DAYS COUNT
@@ -105,30 +128,30 @@ def write_commit_excel(wb, records, start_date, end_date, holidays=None):
                         # Normal (8h) + Overtime (extra)
                         normal_days += 1.0
                         weekday_ot_hours += (hours - 8)
-                        print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK {hours:4.1f}h WEEKDAY → 1.0 NORMAL + {hours-8:4.1f}h OT")
+                        log(f"  Day {day_num:2d} ({day_name}): WORK {hours:4.1f}h WEEKDAY → 1.0 NORMAL + {hours-8:4.1f}h OT")
                     
                     elif hours == 8:
                         # Full day
                         normal_days += 1.0
-                        print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK {hours:4.1f}h WEEKDAY → 1.0 NORMAL DAY")
+                        log(f"  Day {day_num:2d} ({day_name}): WORK {hours:4.1f}h WEEKDAY → 1.0 NORMAL DAY")
                     
                     else:
                         # Partial day
                         fraction = hours / 8
                         normal_days += fraction
-                        print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): WORK {hours:4.1f}h WEEKDAY → {fraction:.3f} PARTIAL DAY")
+                        log(f"  Day {day_num:2d} ({day_name}): WORK {hours:4.1f}h WEEKDAY → {fraction:.3f} PARTIAL DAY")
         
         else:
             # No record found
             if day_type == "WEEKDAY":
                 absent_days += 1
-                print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): NO RECORD → ABSENT on WEEKDAY")
+                log(f"  Day {day_num:2d} ({day_name}): NO RECORD → ABSENT on WEEKDAY")
             else:
-                print(f"  Day {day_num:2d} ({current_date.strftime('%a')}): NO RECORD → OFF ({day_type})")
+                log(f"  Day {day_num:2d} ({day_name}): NO RECORD → OFF ({day_type})")
     
     # ========== CALCULATE TOTALS ==========
-    employee_name = records.get("employee_name", "UNKNOWN")
-    employee_code = records.get("employee_code", "")
+    employee_name = sheet.employee_name if sheet.employee_name is not None else "UNKNOWN"
+    employee_code = sheet.employee_code if sheet.employee_code is not None else ""
     
     shortfall = 0.0
     if actual_work_days < 22 and total_extracted_work_hours < 176:
@@ -138,44 +161,136 @@ def write_commit_excel(wb, records, start_date, end_date, holidays=None):
     reconstructed_total = (normal_days * 8) + weekday_ot_hours + weekend_ot_hours + holiday_ot_hours
     match = abs(reconstructed_total - total_extracted_work_hours) < 0.01
     
-    print(f"\n{'='*80}")
-    print(f"📊 CALCULATION BREAKDOWN :")
-    print(f"{'='*80}")
-    print(f"\n  WEEKDAY WORK:")
-    print(f"    Normal Days:        {normal_days:8.2f} days × 8h = {normal_days*8:8.1f}h")
-    print(f"    Weekday Overtime:   {weekday_ot_hours:36.1f}h")
-    print(f"\n  SPECIAL WORK:")
-    print(f"    Weekend OT:         {weekend_ot_hours:36.1f}h")
-    print(f"    Holiday OT:         {holiday_ot_hours:36.1f}h")
-    print(f"\n  CATEGORY TOTALS:")
-    print(f"    Reconstructed:      {reconstructed_total:36.1f}h (from categories)")
-    print(f"    Extracted:          {total_extracted_work_hours:36.1f}h (sum of WORK)")
-    print(f"    Verification:       {'✅ MATCH' if match else '❌ MISMATCH - CALC ERROR'}")
+    log(f"\n{'='*80}")
+    log(f"📊 CALCULATION BREAKDOWN :")
+    log(f"{'='*80}")
+    log(f"\n  WEEKDAY WORK:")
+    log(f"    Normal Days:        {normal_days:8.2f} days × 8h = {normal_days*8:8.1f}h")
+    log(f"    Weekday Overtime:   {weekday_ot_hours:36.1f}h")
+    log(f"\n  SPECIAL WORK:")
+    log(f"    Weekend OT:         {weekend_ot_hours:36.1f}h")
+    log(f"    Holiday OT:         {holiday_ot_hours:36.1f}h")
+    log(f"\n  CATEGORY TOTALS:")
+    log(f"    Reconstructed:      {reconstructed_total:36.1f}h (from categories)")
+    log(f"    Extracted:          {total_extracted_work_hours:36.1f}h (sum of WORK)")
+    log(f"    Verification:       {'✅ MATCH' if match else '❌ MISMATCH - CALC ERROR'}")
     
     if not match:
-        print(f"    Difference:         {abs(reconstructed_total - total_extracted_work_hours):36.2f}h")
-        print(f"\n    ⚠️  CRITICAL ERROR - Calculation mismatch detected!")
-        print(f"    This must be fixed before salary computation!\n")
-    
-    print(f"\n  ABSENCES:")
-    print(f"    Absent/Leave Days:  {absent_days:36d}")
-    print(f"    Work Days:          {actual_work_days:36d}")
-    print(f"    Shortfall Hours:    {shortfall:36.1f}h")
-    print(f"{'='*80}\n")
-    
-    # Write to Excel
-    ws.cell(row=row, column=1).value = employee_name
-    ws.cell(row=row, column=2).value = employee_code
-    ws.cell(row=row, column=3).value = False
-    ws.cell(row=row, column=4).value = start_date
-    ws.cell(row=row, column=5).value = end_date
-    ws.cell(row=row, column=6).value = normal_days
-    ws.cell(row=row, column=7).value = weekday_ot_hours
-    ws.cell(row=row, column=8).value = weekend_ot_hours
-    ws.cell(row=row, column=9).value = holiday_ot_hours
-    ws.cell(row=row, column=10).value = absent_days
-    ws.cell(row=row, column=11).value = shortfall
-    
-    print(f"✅ Written to row {row}\n")
-    
-    return wb, total_extracted_work_hours
\ No newline at end of file
+        logger.error(
+            "CRITICAL ERROR - Calculation mismatch detected for %s (difference %.2fh)! "
+            "This must be fixed before salary computation!",
+            employee_name, abs(reconstructed_total - total_extracted_work_hours)
+        )
+    
+    log(f"\n  ABSENCES:")
+    log(f"    Absent/Leave Days:  {absent_days:36d}")
+    log(f"    Work Days:          {actual_work_days:36d}")
+    log(f"    Shortfall Hours:    {shortfall:36.1f}h")
+    log(f"{'='*80}\n")
+    
+    return {
+        "employee_name": employee_name,
+        "employee_code": employee_code,
+        "flag": False,
+        "start_date": start_date,
+        "end_date": end_date,
+        "normal_days": normal_days,
+        "weekday_ot_hours": weekday_ot_hours,
+        "weekend_ot_hours": weekend_ot_hours,
+        "holiday_ot_hours": holiday_ot_hours,
+        "absent_days": absent_days,
+        "shortfall": shortfall,
+        "total_work_hours": total_extracted_work_hours,
+    }
+
+
+def next_free_row(ws) -> int:
+    """First row (after the header) whose first column is empty"""
+    row = 2
+    while ws.cell(row=row, column=1).value is not None:
+        row += 1
+    return row
+
+
+def append_rows(wb, rows):
+    """Append computed employee rows to the active sheet in one pass"""
+    ws = wb.active
+    row = next_free_row(ws)
+    
+    for values in rows:
+        for column, field in enumerate(ROW_FIELDS, start=1):
+            ws.cell(row=row, column=column).value = values[field]
+        row += 1
+    
+    return wb
+
+
+def write_rows_streaming(template, rows, output):
+    """
+    Write the template's header rows plus all employee rows through an
+    openpyxl write-only workbook, so memory stays flat for large outputs.
+    Only the active sheet's header values, styles and column widths are
+    copied: other sheets, merged cells, freeze panes, data validation and
+    conditional formatting are lost.
+    
+    template and output may be paths or file-like objects.
+    """
+    template_wb = openpyxl.load_workbook(template)
+    template_ws = template_wb.active
+    
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=template_ws.title)
+    
+    for key, dimension in template_ws.column_dimensions.items():
+        if dimension.width:
+            ws.column_dimensions[key].width = dimension.width
+    
+    # Copy header rows (everything above the first free row) with their styles
+    for template_row in template_ws.iter_rows(max_row=next_free_row(template_ws) - 1):
+        header = []
+        for template_cell in template_row:
+            cell = WriteOnlyCell(ws, value=template_cell.value)
+            if template_cell.has_style:
+                cell.font = copy(template_cell.font)
+                cell.fill = copy(template_cell.fill)
+                cell.border = copy(template_cell.border)
+                cell.alignment = copy(template_cell.alignment)
+                cell.number_format = template_cell.number_format
+            header.append(cell)
+        ws.append(header)
+    
+    for values in rows:
+        ws.append([values[field] for field in ROW_FIELDS])
+    
+    wb.save(output)
+
+
+def save_consolidated(template, rows, output, streaming=None):
+    """
+    Save the template filled with rows. The full template is kept unless
+    streaming (default: EXCEL_STREAMING) is asked for explicitly; the row
+    count never changes what the output contains.
+    """
+    if EXCEL_STREAMING if streaming is None else streaming:
+        logger.warning(
+            "Streaming %d row(s): only the template header, styles and column widths "
+            "are kept (no other sheets, merged cells, validation or formatting)", len(rows)
+        )
+        write_rows_streaming(template, rows, output)
+        return
+    
+    wb = openpyxl.load_workbook(template)
+    append_rows(wb, rows)
+    wb.save(output)
+
+
+def write_commit_excel(wb, records, start_date, end_date, holidays=None, trace=True, calendar=None):
+    """
+    Compute one employee's row and append it to the workbook.
+    
+    Kept for single-employee use; for many employees compute the rows with
+    compute_employee_row and write them with append_rows/save_consolidated.
+    """
+    row = compute_employee_row(records, start_date, end_date, holidays, trace=trace, calendar=calendar)
+    append_rows(wb, [row])
+    return wb, row["total_work_hours"]
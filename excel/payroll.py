@@ -0,0 +1,90 @@
+import numpy as np
+from utils.attendance import as_sheet, DAYS, MISSING, ABSENT, LEAVE, HOLIDAY, WORK
+from utils.dates import PeriodCalendar
+
+# Status codes of the employees x days matrix are AttendanceSheet's
+
+# Day type codes of the period mask (shared with PeriodCalendar.day_types)
+WEEKDAY, WEEKEND, HOLIDAY_DAY = PeriodCalendar.WEEKDAY, PeriodCalendar.WEEKEND, PeriodCalendar.HOLIDAY
+
+
+def build_matrices(results, total_days):
+    """
+    Hours and status code matrices (employees x period days) from
+    extraction results (AttendanceSheets or dicts). Record day N fills
+    period day N, as in compute_employee_row.
+    """
+    hours = np.zeros((len(results), total_days), dtype=np.float64)
+    status = np.zeros((len(results), total_days), dtype=np.uint8)
+    days = min(DAYS, total_days)
+
+    for i, result in enumerate(results):
+        # Each sheet's arrays are copied in as whole rows
+        sheet = as_sheet(result)
+        hours[i, :days] = np.frombuffer(sheet.hours, dtype=np.float64, count=days)
+        status[i, :days] = np.frombuffer(sheet.status, dtype=np.uint8, count=days)
+
+    return hours, status
+
+
+def _field(result, name, default):
+    if isinstance(result, dict):
+        return result.get(name, default)
+    value = getattr(result, name)
+    return default if value is None else value
+
+
+def compute_rows_vectorized(results, start_date, end_date, holidays=None, calendar=None):
+    """
+    Vectorized equivalent of compute_employee_row over many employees.
+
+    Builds the employees x days matrices once, applies the period's day
+    type mask and derives every category column with array operations.
+    Returns one row dict per result, in order.
+    """
+    if calendar is None:
+        calendar = PeriodCalendar(start_date, end_date, holidays)
+    day_types = np.frombuffer(calendar.day_types, dtype=np.uint8)
+    hours, status = build_matrices(results, len(day_types))
+
+    weekday = day_types == WEEKDAY
+    weekend = day_types == WEEKEND
+    holiday = day_types == HOLIDAY_DAY
+
+    worked = (status == WORK) & (hours > 0)
+    holiday_worked = (status == HOLIDAY) & (hours > 0)
+    weekday_work = worked & weekday
+
+    absent = (
+        (status == ABSENT) | (status == LEAVE) | (status == MISSING) | ((status == WORK) & (hours <= 0))
+    ) & weekday
+
+    normal_days = np.where(weekday_work, np.minimum(hours, 8) / 8, 0).sum(axis=1)
+    weekday_ot = np.where(weekday_work & (hours > 8), hours - 8, 0).sum(axis=1)
+    weekend_ot = np.where(worked & weekend, hours, 0).sum(axis=1)
+    holiday_ot = np.where((worked & holiday) | holiday_worked, hours, 0).sum(axis=1)
+
+    paid = worked | holiday_worked
+    total_hours = np.where(paid, hours, 0).sum(axis=1)
+    work_days = paid.sum(axis=1)
+    absent_days = absent.sum(axis=1)
+
+    shortfall = np.where((work_days < 22) & (total_hours < 176), 176 - total_hours, 0.0)
+
+    return [
+        {
+            "employee_name": _field(result, "employee_name", "UNKNOWN"),
+            "employee_code": _field(result, "employee_code", ""),
+            "flag": False,
+            "start_date": start_date,
+            "end_date": end_date,
+            "normal_days": float(normal_days[i]),
+            "weekday_ot_hours": float(weekday_ot[i]),
+            "weekend_ot_hours": float(weekend_ot[i]),
+            "holiday_ot_hours": float(holiday_ot[i]),
+            "absent_days": int(absent_days[i]),
+            "shortfall": float(shortfall[i]),
+            "total_work_hours": float(total_hours[i]),
+        }
+        for i, result in enumerate(results)
+    ]
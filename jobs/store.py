@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+from datetime import date
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import time
+import uuid
+
+# Where queued batches, their uploads and their workbooks live; by default
+# next to the app, so the UI and workers started elsewhere share one queue
+DEFAULT_JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".jobs")
+JOBS_DIR = os.getenv("JOBS_DIR", DEFAULT_JOBS_DIR)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    SQLite queue of consolidation batches shared by the Streamlit app
+    (which submits and polls) and the worker processes (which claim and
+    run). Each job's template, PDFs and output workbook are kept under
+    <jobs_dir>/<job id>/. Safe to share between threads and processes
+    (one connection per call).
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR):
+        # Absolute, so the file paths stored in job params don't depend on the cwd
+        jobs_dir = os.path.abspath(jobs_dir)
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.jobs_dir = jobs_dir
+        self.path = os.path.join(jobs_dir, "jobs.sqlite3")
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker TEXT,
+                    output TEXT,
+                    summary TEXT,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def submit(self, name, template, pdfs, start: date, end: date, holidays=(), **options):
+        """
+        Queue a batch and return its id. template is the workbook bytes and
+        pdfs a list of (file name, file object or bytes); both are copied
+        into the job directory before the job becomes visible to workers.
+        options (workers, batch_llm, memory_limit_mb) are passed to the run.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        pdf_dir = os.path.join(self.job_dir(job_id), "pdfs")
+        os.makedirs(pdf_dir)
+
+        with open(os.path.join(self.job_dir(job_id), "template.xlsx"), "wb") as f:
+            f.write(template)
+        pdf_paths = []
+        for i, (file_name, data) in enumerate(pdfs):
+            # Index prefix keeps upload order and tells duplicate names apart
+            path = os.path.join(pdf_dir, f"{i:04d}_{os.path.basename(file_name)}")
+            with open(path, "wb") as f:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    f.write(data)
+                else:
+                    data.seek(0)
+                    shutil.copyfileobj(data, f, 1024 * 1024)
+            pdf_paths.append(path)
+
+        params = {
+            "start": str(start),
+            "end": str(end),
+            "holidays": sorted(str(h) for h in holidays),
+            "pdfs": pdf_paths,
+            **options,
+        }
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, status, params, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, name, QUEUED, json.dumps(params), len(pdf_paths), time.time())
+            )
+        return job_id
+
+    def claim(self, worker: str):
+        """Mark the oldest queued job as running for worker and return it, or None"""
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front, so two workers can't claim one job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, worker = ?, done = 0 WHERE id = ?",
+                        (RUNNING, time.time(), worker, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row else None
+
+    def progress(self, job_id: str, done: int):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET done = ? WHERE id = ?", (done, job_id))
+
+    def finish(self, job_id: str, output, summary: dict):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, done = total, output = ?, summary = ? WHERE id = ?",
+                (DONE, time.time(), output, json.dumps(summary), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                (FAILED, time.time(), error, job_id)
+            )
+
+    def retry(self, job_id: str) -> bool:
+        """Queue a failed job again; its journal keeps the PDFs already extracted"""
+        with self._connect() as conn:
+            return bool(conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, finished_at = NULL, worker = NULL, "
+                "done = 0, error = NULL WHERE id = ? AND status = ?",
+                (QUEUED, job_id, FAILED)
+            ).rowcount)
+
+    def requeue_orphans(self):
+        """
+        Put running jobs whose worker process on this host is gone back in
+        the queue (e.g. after a crash or a killed worker). Returns their ids.
+        """
+        host = socket.gethostname()
+        orphans = []
+        with self._connect() as conn:
+            for row in conn.execute("SELECT id, worker FROM jobs WHERE status = ?", (RUNNING,)):
+                worker_host, _, pid = (row["worker"] or "").rpartition(":")
+                if worker_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    orphans.append(row["id"])
+            for job_id in orphans:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = NULL, worker = NULL, done = 0 WHERE id = ? AND status = ?",
+                    (QUEUED, job_id, RUNNING)
+                )
+        return orphans
+
+    def get(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def list(self, limit: int = 50):
+        """Most recent jobs first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def delete(self, job_id: str):
+        """Remove a finished job and its files"""
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE id = ? AND status IN (?, ?)", (job_id, DONE, FAILED)
+            ).rowcount
+        if deleted:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+
+def _job(row):
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+    return job
+
+
+def worker_id() -> str:
+    """host:pid of the calling process, as recorded on claimed jobs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,141 @@
+"""
+Worker pool that runs batches queued from the Streamlit app.
+
+Runs outside the Streamlit process, so a browser refresh or a dropped
+connection doesn't lose the work, and several users' month-end runs can
+be queued at once.
+
+Example:
+    python -m jobs.worker --processes 2
+"""
+from cli import consolidate
+from jobs.store import JobStore, JOBS_DIR, worker_id
+from utils.dates import PeriodCalendar
+from utils.journal import Journal
+from utils.metrics import configure_logging, get_metrics
+from datetime import date
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of an empty queue
+JOBS_POLL_S = float(os.getenv("JOBS_POLL_S", "2"))
+
+
+def run_job(store: JobStore, job):
+    """
+    Run one claimed job and record its outcome in the store. The job's
+    journal carries over between attempts, so a requeued or retried job
+    only extracts the PDFs that failed or never finished.
+    """
+    params = job["params"]
+    start, end = date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    calendar = PeriodCalendar(start, end, [date.fromisoformat(h) for h in params["holidays"]])
+    job_dir = store.job_dir(job["id"])
+    output = os.path.join(job_dir, f"COMM_IT_Attendance_{start}_{end}.xlsx")
+    done = 0
+
+    def on_done(idx, result, error):
+        nonlocal done
+        done += 1
+        store.progress(job["id"], done)
+
+    logger.info("Job %s: %d PDF(s) for %s", job["id"], job["total"], job["name"])
+    get_metrics().reset()
+    try:
+        summary = consolidate(
+            params["pdfs"], os.path.join(job_dir, "template.xlsx"), output, start, end, calendar,
+            on_done=on_done, journal=Journal(os.path.join(job_dir, "journal.jsonl"), resume=True),
+            **{k: params[k] for k in ("workers", "batch_llm", "memory_limit_mb") if k in params}
+        )
+    except Exception as e:
+        logger.exception("Job %s failed", job["id"])
+        store.fail(job["id"], f"{type(e).__name__}: {e}")
+        return
+
+    store.finish(job["id"], summary["output"], summary)
+    logger.info("Job %s done: %d employee(s)", job["id"], summary["totals"]["ok"])
+
+
+def work(jobs_dir=JOBS_DIR, poll=JOBS_POLL_S, once=False):
+    """Claim and run jobs until stopped (or until the queue is empty with once)"""
+    configure_logging()
+    store = JobStore(jobs_dir)
+    stopping = False
+
+    def stop(signum, frame):
+        # Finish the current job, then exit
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    while not stopping:
+        job = store.claim(worker_id())
+        if job is None:
+            if once:
+                break
+            time.sleep(poll)
+            continue
+        run_job(store, job)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued attendance consolidation jobs")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOBS_PROCESSES", "1")),
+                        help="Jobs run at the same time, one process each")
+    parser.add_argument("--jobs-dir", default=JOBS_DIR, help="Job store directory (default: JOBS_DIR or .jobs next to the app)")
+    parser.add_argument("--poll", type=float, default=JOBS_POLL_S, help="Seconds between polls of an empty queue")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--log-level", help="Logging level (default: LOG_LEVEL or INFO)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.log_level)
+
+    requeued = JobStore(args.jobs_dir).requeue_orphans()
+    if requeued:
+        logger.warning("Requeued %d job(s) left running by a dead worker", len(requeued))
+
+    if args.processes <= 1:
+        work(args.jobs_dir, args.poll, args.once)
+        return 0
+
+    # Every process has its own Groq rate limiter, so split the account's
+    # limits between them (children read these when importing llm_client)
+    for name, default in (("GROQ_RPM", "30"), ("GROQ_TPM", "12000")):
+        os.environ[name] = str(max(1, int(os.getenv(name, default)) // args.processes))
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=work, args=(args.jobs_dir, args.poll, args.once), name=f"jobs-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        forward(signal.SIGTERM, None)
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,30 @@
 import streamlit as st
-from agents.extractor import extract_attendance
-from excel.excel_writer import write_commit_excel
-from datetime import date, datetime
+from agents.extractor import extract_many, employee_results, extraction_complete, DEFAULT_WORKERS
+from excel.excel_writer import save_consolidated
+from excel.payroll import compute_rows_vectorized
+from utils.cache import get_cache, file_digest
+from utils.dates import load_holidays, PeriodCalendar, DEFAULT_HOLIDAYS_FILE
+from agents.llm_client import scheduler_stats
+from agents.llm_transport import LLM_MODE, LIVE_MODES
+from utils.metrics import configure_logging, get_metrics, stage
+from utils.memory import MemoryGate, MEMORY_LIMIT_MB
+from jobs.store import JobStore
+from datetime import date
 from dotenv import load_dotenv
 import openpyxl
 import io
 import os
+import shutil
+import tempfile
 
 load_dotenv()
+configure_logging()
 
 st.set_page_config(page_title="Attendance AI", layout="wide")
 
-HOLIDAYS_2025 = [
-    date(2025, 1, 26),   # Republic Day
-    date(2025, 3, 8),    # Maha Shivaratri
-    date(2025, 3, 10),   # Holi
-    date(2025, 3, 29),   # Good Friday
-    date(2025, 4, 11),   # Eid ul-Fitr (Estimated)
-    date(2025, 4, 17),   # Ram Navami
-    date(2025, 4, 18),   # Mahavir Jayanti
-    date(2025, 5, 23),   # Buddha Purnima
-    date(2025, 6, 20),   # Eid ul-Adha (Estimated)
-    date(2025, 7, 17),   # Muharram
-    date(2025, 8, 15),   # Independence Day
-    date(2025, 8, 27),   # Janmashtami
-    date(2025, 9, 16),   # Milad un-Nabi
-    date(2025, 10, 2),   # Gandhi Jayanti
-    date(2025, 10, 20),  # Dussehra
-    date(2025, 11, 1),   # Diwali (Lakshmi Puja)
-    date(2025, 11, 2),   # Diwali (Govardhan Puja)
-    date(2025, 11, 3),   # Bhai Dooj
-    date(2025, 12, 25),  # Christmas
-]
+# Multi-year holiday calendar (one "YYYY-MM-DD,name" per line)
+HOLIDAYS_FILE = os.getenv("HOLIDAYS_FILE", DEFAULT_HOLIDAYS_FILE)
+HOLIDAYS = load_holidays(HOLIDAYS_FILE)
 
 # Header
 st.title("📊 Attendance AI – COMM-IT Consolidation Tool")
@@ -42,7 +35,10 @@ st.markdown("Upload attendance PDFs and generate consolidated attendance sheet")
 with st.sidebar:
     st.header("⚙️ Configuration")
     
-    if not os.getenv("GROQ_API_KEY"):
+    # Only the live and record transports call Groq; replay/fake run offline
+    if LLM_MODE not in LIVE_MODES:
+        st.info(f"🧪 Offline LLM mode: {LLM_MODE}")
+    elif not os.getenv("GROQ_API_KEY"):
         st.error("⚠️ GROQ_API_KEY not found in environment")
         st.stop()
     else:
@@ -68,8 +64,11 @@ with st.sidebar:
     st.divider()
     st.subheader("🏛️ Holidays Configuration")
     
+    # Calendar of the period, built once and shared by all employees
+    calendar = PeriodCalendar(start_date, end_date, HOLIDAYS)
+    
     # Show holidays in the period
-    holidays_in_period = [h for h in HOLIDAYS_2025 if start_date <= h <= end_date]
+    holidays_in_period = calendar.holidays_in_period()
     if holidays_in_period:
         st.write("**Holidays in this period:**")
         for holiday in holidays_in_period:
@@ -77,6 +76,28 @@ with st.sidebar:
     else:
         st.write("No holidays in this period")
 
+    st.divider()
+    st.subheader("⚡ Performance")
+    max_workers = st.number_input(
+        "Parallel extractions",
+        min_value=1,
+        max_value=32,
+        value=DEFAULT_WORKERS,
+        help="Number of PDFs extracted at the same time"
+    )
+    memory_limit_mb = st.number_input(
+        "Memory limit (MB)",
+        min_value=0,
+        value=int(MEMORY_LIMIT_MB),
+        step=256,
+        help="Hold back new PDFs while the app uses more memory than this (0 = no limit)"
+    )
+    batch_llm = st.checkbox(
+        "Batch short timesheets",
+        value=False,
+        help="Send several short timesheets in one LLM request to save prompt tokens"
+    )
+
 # Main area
 col1, col2 = st.columns([1, 1])
 
@@ -115,7 +136,54 @@ with col2:
 # Processing
 st.divider()
 
-if st.button("🚀 Generate Consolidated Sheet", type="primary", use_container_width=True):
+# Extraction results of this session, keyed by PDF content hash. They don't
+# depend on the period, holidays or template, so changing any of those only
+# reruns the payroll categorization and the workbook write below.
+if "extractions" not in st.session_state:
+    st.session_state.extractions = {}
+    st.session_state.errors = {}
+    st.session_state.run_stats = []
+    st.session_state.generated = False
+    st.session_state.digests = {}
+
+# Content hash of each upload, computed once per upload (file_id) rather
+# than on every rerun; digests of removed uploads are dropped
+digests = {pdf.file_id: st.session_state.digests.get(pdf.file_id) for pdf in pdfs or []}
+for pdf in pdfs or []:
+    if digests[pdf.file_id] is None:
+        digests[pdf.file_id] = file_digest(pdf.getbuffer())
+st.session_state.digests = digests
+pdf_hashes = [digests[pdf.file_id] for pdf in pdfs or []]
+
+col_generate, col_queue = st.columns([3, 1])
+with col_generate:
+    generate = st.button("🚀 Generate Consolidated Sheet", type="primary", use_container_width=True)
+with col_queue:
+    queue_job = st.button(
+        "📥 Queue as background job",
+        use_container_width=True,
+        help="Run on the job workers (python -m jobs.worker); follow it on the Jobs page"
+    )
+
+if queue_job:
+    if not template_file or not pdfs:
+        st.error("❌ Please upload the COMM-IT template and at least one PDF")
+        st.stop()
+    
+    # The job store keeps its own copy of the uploads, so this page can be
+    # refreshed or closed while the workers run the batch
+    with st.spinner("Queueing job..."):
+        job_id = JobStore().submit(
+            f"{len(pdfs)} PDF(s), {start_date} to {end_date}",
+            template_file.getvalue(),
+            [(pdf.name, pdf.getbuffer()) for pdf in pdfs],
+            start_date, end_date, calendar.holidays_in_period(),
+            workers=max_workers, batch_llm=batch_llm, memory_limit_mb=memory_limit_mb
+        )
+    st.success(f"✅ Queued job {job_id} – follow it on the Jobs page")
+    st.page_link("pages/background_jobs.py", label="Open Jobs", icon="🗂️")
+
+if generate:
     if not template_file:
         st.error("❌ Please upload COMM-IT template")
         st.stop()
@@ -126,67 +194,179 @@ if st.button("🚀 Generate Consolidated Sheet", type="primary", use_container_w
     
     # Load template
     with st.spinner("Loading template..."):
-        template_bytes = template_file.read()
-        wb = openpyxl.load_workbook(io.BytesIO(template_bytes))
+        # Only validates the template here; rows are written on every rerun below
+        openpyxl.load_workbook(io.BytesIO(template_file.getvalue()), read_only=True).close()
         st.success("✅ Template loaded")
     
-    # Process each PDF
-    st.subheader("📋 Processing Attendance Sheets")
+    # Keep results of PDFs still uploaded; extract only new (or failed) ones,
+    # including bundles where some employee failed
+    extractions = {
+        h: st.session_state.extractions[h] for h in pdf_hashes
+        if h in st.session_state.extractions and extraction_complete(st.session_state.extractions[h])
+    }
+    todo = []
+    for i, h in enumerate(pdf_hashes):
+        if h not in extractions and all(pdf_hashes[j] != h for j in todo):
+            todo.append(i)
+    errors = {}
+    
+    completed = 0
+    memory_gate = MemoryGate(memory_limit_mb)
+    get_metrics().reset()
+    cache = get_cache()
+    cache_before = cache.stats() if cache else None
+    
+    if todo:
+        st.subheader("📋 Processing Attendance Sheets")
+        progress_bar = st.progress(0)
+        
+        # One expander per PDF, where days fill in live while the LLM streams
+        live_container = st.empty()
+        with live_container.container():
+            expanders = [
+                st.expander(f"📄 Processing: {pdfs[i].name}", expanded=True)
+                for i in todo
+            ]
+        live_days = [expander.empty() for expander in expanders]
+        streamed = [[] for _ in todo]
+        
+        def on_record(idx, record):
+            streamed[idx].append(record)
+            live_days[idx].caption("⏳ " + " · ".join(
+                f"Day {r.get('day')}: {r.get('hours', 0)}h {r.get('status', '')}" for r in streamed[idx]
+            ))
+        
+        def on_done(idx, result, error):
+            global completed
+            completed += 1
+            progress_bar.progress(completed / len(todo))
+            live_days[idx].empty()
+        
+        # Spool uploads to disk: workers then read pages lazily by path instead
+        # of each holding a full in-memory copy of its PDF
+        with tempfile.TemporaryDirectory(prefix="attendance_") as spool_dir:
+            pdf_paths = []
+            for i in todo:
+                path = os.path.join(spool_dir, f"{i:04d}.pdf")
+                pdfs[i].seek(0)
+                with open(path, "wb") as f:
+                    shutil.copyfileobj(pdfs[i], f, 1024 * 1024)
+                pdf_paths.append(path)
+            
+            with st.spinner(f"🔍 Extracting data from {len(todo)} PDF(s)..."):
+                outcomes = extract_many(
+                    pdf_paths, max_workers=max_workers, on_done=on_done,
+                    batch_llm=batch_llm, on_record=on_record, memory_gate=memory_gate
+                )
+        
+        live_container.empty()
+        for i, (result, error) in zip(todo, outcomes):
+            if error:
+                errors[pdf_hashes[i]] = error
+            else:
+                extractions[pdf_hashes[i]] = result
+    
+    st.session_state.extractions = extractions
+    st.session_state.errors = errors
+    st.session_state.generated = True
     
-    progress_bar = st.progress(0)
-    status_container = st.container()
+    # Summary of the extraction run, shown until the next one
+    run_stats = [f"🔁 Extracted {len(todo)} PDF(s), reused {len(pdfs) - len(todo)} from this session"]
+    if cache:
+        cache_after = cache.stats()
+        run_stats.append(
+            f"♻️ Cache: {cache_after['hits'] - cache_before['hits']} hit(s), "
+            f"{cache_after['misses'] - cache_before['misses']} miss(es) "
+            f"({cache_after['entries']} cached PDFs)"
+        )
+    llm_stats = scheduler_stats()
+    run_stats.append(
+        f"🚦 Groq: {llm_stats['calls']} call(s), {llm_stats['retries']} retry(ies), "
+        f"avg wait {llm_stats['avg_wait_s']}s, max wait {llm_stats['max_wait_s']}s"
+    )
+    memory_stats = memory_gate.stats()
+    if memory_stats["limit_mb"]:
+        run_stats.append(
+            f"🧠 Memory: peak {memory_stats['peak_rss_mb']} MB of {memory_stats['limit_mb']} MB, "
+            f"{memory_stats['waits']} backpressure wait(s)"
+        )
+    st.session_state.run_stats = run_stats
+
+extractions = st.session_state.extractions
+errors = st.session_state.errors
+ready = pdfs and all(h in extractions or h in errors for h in pdf_hashes)
+
+if st.session_state.generated and pdfs and not ready:
+    st.info("ℹ️ New PDFs uploaded – click Generate to extract them")
+
+# Results: rebuilt from the stored extractions on every rerun, so a new
+# period, holiday file or template costs only the payroll stage
+if st.session_state.generated and ready and template_file:
+    template_bytes = template_file.getvalue()
     
+    st.subheader("📋 Attendance Sheets")
     results = []
     
-    for idx, pdf in enumerate(pdfs):
-        with status_container:
-            with st.expander(f"📄 Processing: {pdf.name}", expanded=True):
-                try:
-                    # Extract data
-                    st.info(f"🔍 Extracting data from {pdf.name}...")
-                    result = extract_attendance(pdf.read())
+    # Upload order keeps the workbook deterministic
+    for pdf, h in zip(pdfs, pdf_hashes):
+        with st.expander(f"📄 {pdf.name}"):
+            try:
+                if h in errors:
+                    raise errors[h]
+                
+                employees = employee_results(extractions[h])
+                if len(employees) > 1:
+                    st.info(f"📚 Bundle of {len(employees)} employees")
+                
+                for employee in employees:
+                    pages = employee.get("pages")
+                    where = f"{pdf.name} (pages {pages[0]}-{pages[1]})" if pages else pdf.name
                     
-                    if not result or not result.get("records"):
-                        st.warning(f"⚠️ No attendance records found in {pdf.name}")
+                    if employee.get("error"):
+                        st.error(f"❌ Error processing {where}: {employee['error']}")
+                        continue
+                    
+                    if not employee.get("records"):
+                        st.warning(f"⚠️ No attendance records found in {where}")
                         continue
                     
                     # Display extracted info
                     col_a, col_b, col_c = st.columns(3)
                     with col_a:
-                        st.metric("Employee", result.get("employee_name", "UNKNOWN"))
+                        st.metric("Employee", employee.get("employee_name", "UNKNOWN"))
                     with col_b:
-                        st.metric("Records", len(result.get("records", [])))
+                        st.metric("Records", len(employee.get("records", [])))
                     with col_c:
                         work_hours = sum(
-                              r.get("hours", 0) for r in result.get("records", []) 
+                              r.get("hours", 0) for r in employee.get("records", []) 
                               if r.get("status", "").upper() == "WORK"
                         )
                         st.metric("Present Work Hours", f"{work_hours:.1f}h")
                     
                     # Show debug info
-                    with st.expander("🔍 Debug: View Extracted Data"):
-                        st.json(result)
-                    
-                    # Write to Excel
-                    wb, total_hours = write_commit_excel(wb, result, start_date, end_date, holidays=HOLIDAYS_2025)
-                    st.success(f"✅ Added: {result.get('employee_name')}")
+                    with st.expander(f"🔍 Debug: View Extracted Data ({employee.get('employee_name')})"):
+                        st.json(employee)
                     
-                    results.append(result)
+                    st.success(f"✅ Added: {employee.get('employee_name')}")
                     
-                except Exception as e:
-                    st.error(f"❌ Error processing {pdf.name}: {str(e)}")
-                    st.exception(e)
-        
-        # Update progress
-        progress_bar.progress((idx + 1) / len(pdfs))
+                    results.append(employee)
+                
+            except Exception as e:
+                st.error(f"❌ Error processing {pdf.name}: {str(e)}")
+                st.exception(e)
     
     # Save final workbook
     if results:
         st.divider()
         st.subheader("💾 Download Results")
+        metrics = get_metrics()
         
+        # Payroll categories for all employees at once, then one workbook write
+        with stage("payroll"):
+            rows = compute_rows_vectorized(results, start_date, end_date, calendar=calendar)
         out = io.BytesIO()
-        wb.save(out)
+        with stage("excel_write"):
+            save_consolidated(io.BytesIO(template_bytes), rows, out)
         out.seek(0)
         
         col_download, col_summary = st.columns([1, 1])
@@ -204,6 +384,23 @@ if st.button("🚀 Generate Consolidated Sheet", type="primary", use_container_w
         with col_summary:
             st.success(f"✅ Successfully processed {len(results)} employees")
             st.info(f"📅 Period: {start_date} to {end_date}")
+            for line in st.session_state.run_stats:
+                st.info(line)
+        
+        # Per-stage timings of this run
+        with st.expander("⏱️ Stage timings"):
+            st.dataframe(
+                [{"stage": name, **values} for name, values in metrics.summary().items()],
+                use_container_width=True
+            )
+            st.download_button(
+                label="⬇️ Download metrics (JSON)",
+                data=metrics.to_json(),
+                file_name=f"metrics_{start_date}_{end_date}.json",
+                mime="application/json"
+            )
+        if os.getenv("METRICS_TEXTFILE"):
+            metrics.to_prometheus(os.getenv("METRICS_TEXTFILE"))
     else:
         st.error("❌ No records were successfully processed")
 
@@ -0,0 +1,87 @@
+import streamlit as st
+from jobs.store import JobStore, QUEUED, RUNNING, DONE, FAILED
+from datetime import datetime
+import os
+
+st.set_page_config(page_title="Attendance AI – Jobs", layout="wide")
+
+# Seconds between refreshes while jobs are queued or running
+JOBS_REFRESH_S = float(os.getenv("JOBS_REFRESH_S", "3"))
+
+STATUS_ICONS = {QUEUED: "⏳", RUNNING: "⚙️", DONE: "✅", FAILED: "❌"}
+
+st.title("🗂️ Background Jobs")
+st.markdown("Batches queued from the main page, run by `python -m jobs.worker`")
+
+store = JobStore()
+
+
+def _time(ts):
+    return datetime.fromtimestamp(ts).strftime("%d-%b %H:%M:%S") if ts else "–"
+
+
+def show_job(job):
+    icon = STATUS_ICONS.get(job["status"], "")
+    with st.container(border=True):
+        col_a, col_b = st.columns([3, 1])
+        with col_a:
+            st.markdown(f"**{icon} {job['name']}** · `{job['id']}`")
+            st.caption(
+                f"Queued {_time(job['created_at'])} · started {_time(job['started_at'])} · "
+                f"finished {_time(job['finished_at'])}"
+            )
+
+        if job["status"] in (QUEUED, RUNNING):
+            st.progress(job["done"] / job["total"] if job["total"] else 0.0,
+                        text=f"{job['done']}/{job['total']} PDF(s) {job['status']}")
+            return
+
+        if job["status"] == FAILED:
+            st.error(f"❌ {job['error']}")
+        else:
+            totals = job["summary"]["totals"]
+            st.write(
+                f"{totals['ok']} employee(s) · {totals['empty']} empty · {totals['error']} error(s) · "
+                f"{job['summary']['duration_s']}s"
+            )
+            with st.expander("📄 Files"):
+                st.dataframe(job["summary"]["files"], use_container_width=True)
+
+        with col_b:
+            if job["status"] == DONE and job["output"] and os.path.exists(job["output"]):
+                with open(job["output"], "rb") as f:
+                    st.download_button(
+                        label="⬇️ Download Excel",
+                        data=f.read(),
+                        file_name=os.path.basename(job["output"]),
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        type="primary",
+                        key=f"download_{job['id']}",
+                        use_container_width=True
+                    )
+            if job["status"] == FAILED and st.button(
+                "🔁 Retry", key=f"retry_{job['id']}", use_container_width=True,
+                help="Queue again; PDFs already extracted are taken from the job's journal"
+            ):
+                store.retry(job["id"])
+                st.rerun()
+            if st.button("🗑️ Delete", key=f"delete_{job['id']}", use_container_width=True):
+                store.delete(job["id"])
+                st.rerun()
+
+
+@st.fragment(run_every=JOBS_REFRESH_S)
+def job_list():
+    # Re-reads the store on every refresh; only this fragment reruns
+    jobs = store.list()
+    if not jobs:
+        st.info("ℹ️ No jobs yet – queue one from the main page")
+        return
+
+    active = sum(1 for job in jobs if job["status"] in (QUEUED, RUNNING))
+    st.caption(f"{active} active job(s) · refreshes every {JOBS_REFRESH_S:g}s")
+    for job in jobs:
+        show_job(job)
+
+
+job_list()
@@ -0,0 +1,31 @@
+"""
+Resuming from a journal skips only PDFs that were fully extracted.
+"""
+from utils.journal import Journal
+
+GOOD = {"employee_name": "A", "records": [{"day": 1, "hours": 8, "status": "WORK"}]}
+FAILED = {"employee_name": "EXTRACTION_FAILED", "employee_code": "", "records": []}
+
+
+def resumed(tmp_path, result=None, error=None):
+    path = str(tmp_path / "journal.jsonl")
+    Journal(path).record("a.pdf", "digest", result, error)
+    return Journal(path, resume=True).completed("digest")
+
+
+def test_good_result_is_skipped(tmp_path):
+    assert resumed(tmp_path, GOOD) == GOOD
+
+
+def test_error_is_retried(tmp_path):
+    assert resumed(tmp_path, error=ValueError("boom")) is None
+
+
+def test_result_without_records_is_retried(tmp_path):
+    assert resumed(tmp_path, FAILED) is None
+
+
+def test_bundle_with_failed_employee_is_retried(tmp_path):
+    assert resumed(tmp_path, {"employees": [GOOD, FAILED]}) is None
+    assert resumed(tmp_path, {"employees": [GOOD, dict(GOOD, error="boom")]}) is None
+    assert resumed(tmp_path, {"employees": [GOOD, GOOD]}) is not None
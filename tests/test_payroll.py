@@ -0,0 +1,97 @@
+"""
+Parity of the vectorized payroll with the per-employee loop it replaces,
+on hand-written edge cases.
+"""
+from datetime import date
+from excel.excel_writer import compute_employee_row, ROW_FIELDS
+from excel.payroll import compute_rows_vectorized
+from utils.attendance import AttendanceSheet
+from utils.dates import PeriodCalendar
+import pytest
+
+# Oct 2025: the 1st is a Wednesday, the 4th/5th a weekend
+OCTOBER = (date(2025, 10, 1), date(2025, 10, 31))
+HOLIDAYS = [date(2025, 10, 6)]
+
+
+def employee(records, name="Test Employee"):
+    return {"employee_name": name, "employee_code": "E1", "records": records}
+
+
+def days(status, hours, day_numbers):
+    return [{"day": d, "hours": hours, "status": status} for d in day_numbers]
+
+
+FULL_MONTH = days("WORK", 8, range(1, 32))
+
+CASES = {
+    "full month": employee(FULL_MONTH),
+    "leave spellings": employee(
+        days("WORK", 8, range(1, 32))[:-4]
+        + days("LEAVE", 0, [28]) + days("L", 0, [29]) + days("AL", 0, [30]) + days("SL", 0, [31])
+    ),
+    "absent and off": employee(days("ABSENT", 0, [1, 2]) + days("OFF", 0, [3, 4]) + days("WORK", 8, range(5, 32))),
+    "work with zero hours": employee(days("WORK", 0, [1, 2, 4]) + days("WORK", 8, range(5, 32))),
+    "holiday with hours": employee(days("HOLIDAY", 6, [6]) + days("HOLIDAY", 0, [7]) + days("WORK", 8, [8, 9])),
+    "work on a holiday": employee(days("WORK", 10, [6]) + days("WORK", 9, [1])),
+    "missing days": employee(days("WORK", 8, [1, 2, 3, 10, 20])),
+    "no records": employee([]),
+    "overtime and partial days": employee(days("WORK", 12, [1, 4]) + days("WORK", 4.5, [2]) + days("work ", 8, [3])),
+    "unknown status": employee(days("REGULAR", 8, [1, 2]) + days("WORK", 8, range(3, 32))),
+    "out of range days": employee(days("WORK", 8, [0, 1, 32, 40])),
+    "shortfall under 22 days": employee(days("WORK", 8, range(1, 21)) + days("WORK", 7.5, [21])),
+    "no shortfall at 22 days": employee(days("WORK", 7.5, range(1, 23))),
+    "no shortfall at 176h": employee(days("WORK", 11, range(1, 17))),
+}
+
+
+def assert_same_rows(expected, actual):
+    assert len(expected) == len(actual)
+    for want, got in zip(expected, actual):
+        for field in ROW_FIELDS + ["total_work_hours"]:
+            assert got[field] == pytest.approx(want[field]), field
+
+
+@pytest.mark.parametrize("start,end", [
+    OCTOBER,
+    (date(2025, 9, 26), date(2025, 10, 25)),
+    (date(2025, 2, 1), date(2025, 2, 28)),
+    # Longer than 31 days: period days 32+ never have a record
+    (date(2025, 9, 26), date(2025, 11, 5)),
+])
+def test_vectorized_matches_per_employee_loop(start, end):
+    calendar = PeriodCalendar(start, end, HOLIDAYS)
+    results = list(CASES.values())
+
+    expected = [compute_employee_row(r, start, end, calendar=calendar) for r in results]
+    actual = compute_rows_vectorized(results, start, end, calendar=calendar)
+
+    assert_same_rows(expected, actual)
+
+
+def test_sheets_and_dicts_give_the_same_rows():
+    calendar = PeriodCalendar(*OCTOBER, HOLIDAYS)
+    results = list(CASES.values())
+    sheets = [AttendanceSheet.from_dict(r) for r in results]
+
+    assert_same_rows(
+        compute_rows_vectorized(results, *OCTOBER, calendar=calendar),
+        compute_rows_vectorized(sheets, *OCTOBER, calendar=calendar),
+    )
+    assert_same_rows(
+        [compute_employee_row(r, *OCTOBER, calendar=calendar) for r in results],
+        [compute_employee_row(s, *OCTOBER, calendar=calendar) for s in sheets],
+    )
+
+
+def test_leave_spellings_count_as_absent_on_weekdays():
+    # Oct 28-31 2025 are Tuesday to Friday
+    row = compute_rows_vectorized([CASES["leave spellings"]], *OCTOBER, holidays=HOLIDAYS)[0]
+    assert row["absent_days"] == 4
+
+
+def test_shortfall_threshold():
+    # Shortfall only applies below both 22 worked days and 176 hours
+    names = ["shortfall under 22 days", "no shortfall at 22 days", "no shortfall at 176h"]
+    rows = compute_rows_vectorized([CASES[n] for n in names], *OCTOBER, holidays=HOLIDAYS)
+    assert [row["shortfall"] for row in rows] == pytest.approx([176 - 167.5, 0, 0])
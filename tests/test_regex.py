@@ -0,0 +1,71 @@
+"""
+Grid parsers on 26th-25th pay period sheets, whose day header wraps at
+the month end: days must come out as period positions, which is how
+payroll reads them.
+"""
+from datetime import date, timedelta
+from agents.regex import regex_grid, period_positions
+from agents.table_extractor import table_sheet
+from excel.excel_writer import compute_employee_row
+from excel.payroll import compute_rows_vectorized
+from utils.dates import PeriodCalendar
+
+# Sep 26 - Oct 25 2025: 30 days, 21 weekdays
+START, END = date(2025, 9, 26), date(2025, 10, 25)
+PERIOD = [START + timedelta(days=i) for i in range(30)]
+LABELS = [str(d.day) for d in PERIOD]
+# 8h on weekdays, OFF on weekends
+CELLS = ["OFF" if d.weekday() >= 5 else "8" for d in PERIOD]
+
+GRID_TEXT = "\n".join([
+    "Employee Name: Jane Doe",
+    "ID # 12345",
+    "Day " + " ".join(LABELS),
+    "Regular " + " ".join(CELLS),
+])
+
+
+def assert_weekday_payroll(sheet):
+    calendar = PeriodCalendar(START, END, [])
+    row = compute_employee_row(sheet, START, END, calendar=calendar)
+    assert row["normal_days"] == 21
+    assert row["weekend_ot_hours"] == 0
+    assert row["absent_days"] == 0
+    assert compute_rows_vectorized([sheet], START, END, calendar=calendar)[0]["normal_days"] == 21
+
+
+def test_period_positions():
+    positions = period_positions([list(range(26, 31)) + list(range(1, 26))])
+    assert positions[26] == 1
+    assert positions[30] == 5
+    assert positions[1] == 6
+    assert positions[25] == 30
+    assert 31 not in positions
+
+
+def test_wrap_across_two_headers():
+    positions = period_positions([list(range(26, 32)), list(range(1, 26))])
+    assert positions[31] == 6
+    assert positions[1] == 7
+
+
+def test_unwrapped_headers_are_positions_already():
+    assert period_positions([list(range(1, 16)), list(range(16, 32))]) is None
+
+
+def test_wrapped_grid_text_gives_period_positions():
+    sheet, aligned = regex_grid(GRID_TEXT)
+    assert aligned
+    # Sep 26 is a Friday, Sep 27 a Saturday
+    assert sheet.get(1) == ("WORK", 8.0)
+    assert sheet.get(2) == ("OFF", 0.0)
+    assert len(sheet) == 30
+    assert_weekday_payroll(sheet)
+
+
+def test_wrapped_table_gives_period_positions():
+    table = [["Day"] + LABELS, ["Regular"] + CELLS]
+    sheet = table_sheet("Employee Name: Jane Doe", [[table]])
+    assert sheet.get(1) == ("WORK", 8.0)
+    assert len(sheet) == 30
+    assert_weekday_payroll(sheet)
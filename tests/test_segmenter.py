@@ -0,0 +1,45 @@
+"""
+Bundle splitting: only a timesheet page naming another employee starts
+a new segment.
+"""
+from agents.regex import employee_header
+from agents.segmenter import iter_segments
+
+
+def timesheet(name, code):
+    return "\n".join([
+        f"Employee Name: {name}",
+        f"ID # {code}",
+        "Day " + " ".join(str(d) for d in range(1, 32)),
+        "Regular " + " ".join(["8"] * 31),
+    ])
+
+
+APPROVAL = "\n".join([
+    "TIMESHEET APPROVAL",
+    "Supervisor Name: Jane Doe",
+    "Identification: attached",
+    "Approved by: ____________    Date: 01/10/2025",
+])
+
+
+def starts(pages):
+    return [first for first, _ in iter_segments(pages)]
+
+
+def test_two_employees_split():
+    assert starts([timesheet("Ahmed Khan", "E1"), timesheet("Sara Lee", "E2")]) == [0, 1]
+
+
+def test_continuation_page_stays():
+    assert starts([timesheet("Ahmed Khan", "E1"), timesheet("Ahmed Khan", "E1")]) == [0]
+
+
+def test_approval_page_stays_with_the_employee():
+    assert starts([timesheet("Ahmed Khan", "E1"), APPROVAL]) == [0]
+    assert starts([APPROVAL, timesheet("Ahmed Khan", "E1"), APPROVAL, timesheet("Sara Lee", "E2")]) == [0, 3]
+
+
+def test_identification_is_not_an_id():
+    assert employee_header("Identification: attached")[1] is None
+    assert employee_header("ID: E7")[1] == "E7"
@@ -0,0 +1,36 @@
+"""
+Streamed responses must parse like the complete ones, however the fence
+and whitespace around the JSON arrive.
+"""
+from agents.stream_parser import RecordStreamParser, StreamAborted
+import pytest
+
+BODY = (
+    '{"employee_name": "X", "records": ['
+    '{"day": 1, "hours": 8, "status": "WORK"}, {"day": 2, "hours": 0, "status": "OFF"}]}'
+)
+
+
+def feed(response, size):
+    parser = RecordStreamParser()
+    records = []
+    for i in range(0, len(response), size):
+        records += parser.feed(response[i:i + size])
+    return records
+
+
+@pytest.mark.parametrize("response", [
+    BODY,
+    "\n\n" + BODY,
+    "```json\n" + BODY + "\n```",
+    "\n```json\n" + BODY + "\n```",
+    "  \n```\n" + BODY + "```",
+])
+@pytest.mark.parametrize("size", [1, 7, 10000])
+def test_records_from_any_framing(response, size):
+    assert [r["day"] for r in feed(response, size)] == [1, 2]
+
+
+def test_prose_aborts():
+    with pytest.raises(StreamAborted):
+        feed("\nSure! Here is the data:", 1000)
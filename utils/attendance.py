@@ -0,0 +1,124 @@
+from array import array
+
+# Days of the month a sheet can hold
+DAYS = 31
+
+# Status codes of a sheet's days; MISSING means the day has no record
+MISSING, ABSENT, OFF, HOLIDAY, WORK, OTHER, LEAVE = range(7)
+
+STATUS_CODES = {
+    "LEAVE": LEAVE, "L": LEAVE, "AL": LEAVE, "SL": LEAVE,
+    "ABSENT": ABSENT,
+    "OFF": OFF,
+    "HOLIDAY": HOLIDAY,
+    "WORK": WORK,
+}
+STATUS_NAMES = {ABSENT: "ABSENT", OFF: "OFF", HOLIDAY: "HOLIDAY", WORK: "WORK", LEAVE: "LEAVE"}
+
+# Employee fields of the dict schema, in output order
+FIELDS = ("employee_name", "employee_code", "po_number", "attendance_type")
+
+_ZERO_HOURS = array("d", bytes(8 * DAYS))
+
+
+class AttendanceSheet:
+    """
+    One employee's month: employee fields plus a fixed-length array of
+    hours and a byte array of status codes, both indexed by day - 1.
+
+    Used inside the extractor, regex parser and payroll code instead of
+    a list of {"day", "hours", "status"} dicts; from_dict/to_dict convert
+    at the edges (LLM output, cache, UI). Statuses without a code keep
+    their name in other, and unknown result keys (e.g. "pages") in extra,
+    so the round trip loses nothing except spelling variants of leave
+    (L, AL, SL become LEAVE).
+    """
+
+    __slots__ = FIELDS + ("hours", "status", "other", "extra")
+
+    def __init__(self, employee_name=None, employee_code=None, po_number=None, attendance_type=None):
+        self.employee_name = employee_name
+        self.employee_code = employee_code
+        self.po_number = po_number
+        self.attendance_type = attendance_type
+        self.hours = _ZERO_HOURS[:]
+        self.status = bytearray(DAYS)
+        self.other = None
+        self.extra = None
+
+    def set(self, day: int, status: str, hours: float):
+        """Record a day (1..31; other days are ignored), replacing any earlier record"""
+        if not 1 <= day <= DAYS:
+            return
+        status = status.upper().strip()
+        code = STATUS_CODES.get(status, OTHER)
+        if code == OTHER:
+            if self.other is None:
+                self.other = {}
+            self.other[day] = status
+        elif self.other:
+            self.other.pop(day, None)
+        self.status[day - 1] = code
+        self.hours[day - 1] = max(0.0, hours)
+
+    def get(self, day: int):
+        """(status, hours) of a day, or None when it has no record"""
+        code = self.status[day - 1]
+        if code == MISSING:
+            return None
+        return self.status_name(day), self.hours[day - 1]
+
+    def status_name(self, day: int) -> str:
+        code = self.status[day - 1]
+        return self.other[day] if code == OTHER else STATUS_NAMES.get(code, "")
+
+    def __len__(self):
+        """Number of days with a record"""
+        return DAYS - self.status.count(MISSING)
+
+    def fill_missing(self):
+        """Mark every day without a record ABSENT with 0 hours, as normalize_records does"""
+        self.status = self.status.replace(bytes([MISSING]), bytes([ABSENT]))
+        return self
+
+    def records(self):
+        """The days with a record in the {"day", "hours", "status"} schema"""
+        return [
+            {"day": day, "hours": self.hours[day - 1], "status": self.status_name(day)}
+            for day in range(1, DAYS + 1) if self.status[day - 1] != MISSING
+        ]
+
+    def add_records(self, records):
+        for rec in records:
+            self.set(int(rec.get("day", 0)), rec.get("status", "ABSENT"), float(rec.get("hours", 0)))
+        return self
+
+    @classmethod
+    def from_days(cls, by_day: dict, **fields):
+        """Sheet from {day: (status, hours)}, as built by the grid parsers"""
+        sheet = cls(**fields)
+        for day, (status, hours) in by_day.items():
+            sheet.set(day, status, hours)
+        return sheet
+
+    @classmethod
+    def from_dict(cls, result: dict):
+        """Sheet from an extraction result dict"""
+        sheet = cls(*(result.get(field) for field in FIELDS))
+        sheet.add_records(result.get("records") or [])
+        extra = {k: v for k, v in result.items() if k not in FIELDS and k != "records"}
+        sheet.extra = extra or None
+        return sheet
+
+    def to_dict(self) -> dict:
+        """Extraction result dict; employee fields that were never set are left out"""
+        result = {field: getattr(self, field) for field in FIELDS if getattr(self, field) is not None}
+        result["records"] = self.records()
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+def as_sheet(result):
+    """AttendanceSheet of a result given as a sheet or as a dict"""
+    return result if isinstance(result, AttendanceSheet) else AttendanceSheet.from_dict(result)
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Where the extraction cache lives and how large it may grow
+CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", ".cache")
+CACHE_MAX_MB = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+CACHE_ENABLED = os.getenv("EXTRACTION_CACHE", "1") != "0"
+
+# OCR text of scanned pages, keyed by page image (same directory)
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "64"))
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE", "1") != "0"
+
+
+def file_digest(source) -> str:
+    """SHA-256 of a PDF given as bytes (or a buffer) or as a file path (hashed in chunks)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(source, model: str, prompt_version: str) -> str:
+    """Content-addressed key: same PDF + same model + same prompt = same result"""
+    return f"{file_digest(source)}:{model}:{prompt_version}"
+
+
+class ExtractionCache:
+    """
+    Persistent SQLite cache of normalized extraction results (or of any
+    JSON value, e.g. the OCR text of a page, when given its own filename).
+
+    Entries are evicted least-recently-used first once the stored results
+    exceed max_bytes. Safe to share between threads (one connection per call).
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+                 filename="extractions.sqlite3"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str):
+        """Return the cached result for key, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE extractions SET last_used = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, result):
+        payload = json.dumps(result)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time())
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = 0
+        stale = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM extractions ORDER BY last_used DESC"
+        ):
+            total += size
+            if total > self.max_bytes:
+                stale.append((key,))
+        if stale:
+            conn.executemany("DELETE FROM extractions WHERE key = ?", stale)
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide extraction cache, or None when disabled"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
+
+
+_ocr_cache = None
+
+
+def get_ocr_cache():
+    """Process-wide cache of OCR text per page image, or None when disabled"""
+    global _ocr_cache
+    if not OCR_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _ocr_cache is None:
+            _ocr_cache = ExtractionCache(
+                max_bytes=int(OCR_CACHE_MAX_MB * 1024 * 1024), filename="ocr.sqlite3"
+            )
+        return _ocr_cache
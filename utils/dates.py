@@ -1,4 +1,11 @@
 from datetime import date, timedelta
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Holiday calendar shipped with the app, found wherever it is started from
+DEFAULT_HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "holidays.csv")
 
 def date_range(start_date: date, end_date: date):
     dates = []
@@ -14,14 +21,14 @@ def is_weekend(check_date: date) -> bool:
     return check_date.weekday() in [5, 6]
 
 
-def is_holiday(check_date: date, holidays: list = None) -> bool:
-    """Check if date is a holiday"""
+def is_holiday(check_date: date, holidays=None) -> bool:
+    """Check if date is a holiday (holidays may be a list or, faster, a set)"""
     if holidays is None:
         holidays = []
     return check_date in holidays
 
 
-def get_day_type(check_date: date, holidays: list = None) -> str:
+def get_day_type(check_date: date, holidays=None) -> str:
     """
     Classify day type:
     - 'WEEKEND': Saturday or Sunday
@@ -39,4 +46,62 @@ def get_day_type(check_date: date, holidays: list = None) -> str:
 def get_day_of_week(check_date: date) -> str:
     """Get day name (Monday, Tuesday, etc.)"""
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    return days[check_date.weekday()]
\ No newline at end of file
+    return days[check_date.weekday()]
+
+
+def load_holidays(path: str) -> list:
+    """
+    Read holidays from a text/CSV file with one ISO date (YYYY-MM-DD) per
+    line, optionally followed by a comma and a name. Blank lines and
+    lines starting with # are ignored. A missing file means no holidays.
+    """
+    holidays = []
+    if not os.path.exists(path):
+        logger.warning("Holiday file %s not found, using no holidays", path)
+        return holidays
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            holidays.append(date.fromisoformat(line.split(",")[0].strip()))
+    return holidays
+
+
+
+class PeriodCalendar:
+    """
+    Day types and weekdays of one pay period, computed once per run and
+    shared by every employee.
+
+    Days are numbered from 1 (start_date) to total_days. day_types and
+    weekdays are compact byte arrays indexed by day_num - 1.
+    """
+
+    WEEKDAY, WEEKEND, HOLIDAY = 0, 1, 2
+    DAY_TYPE_NAMES = ("WEEKDAY", "WEEKEND", "HOLIDAY")
+
+    def __init__(self, start_date: date, end_date: date, holidays=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.holidays = frozenset(holidays or [])
+        self.total_days = (end_date - start_date).days + 1
+
+        days = [start_date + timedelta(days=i) for i in range(self.total_days)]
+        self.weekdays = bytes(d.weekday() for d in days)
+        self.day_types = bytes(
+            self.HOLIDAY if d in self.holidays
+            else self.WEEKEND if d.weekday() in (5, 6)
+            else self.WEEKDAY
+            for d in days
+        )
+
+    def date(self, day_num: int) -> date:
+        return self.start_date + timedelta(days=day_num - 1)
+
+    def day_type(self, day_num: int) -> str:
+        """'WEEKDAY', 'WEEKEND' or 'HOLIDAY', as get_day_type"""
+        return self.DAY_TYPE_NAMES[self.day_types[day_num - 1]]
+
+    def holidays_in_period(self) -> list:
+        return sorted(h for h in self.holidays if self.start_date <= h <= self.end_date)
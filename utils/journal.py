@@ -0,0 +1,82 @@
+from agents.extractor import extraction_complete
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Journal:
+    """
+    Append-only JSONL checkpoint of a batch run: one line per PDF outcome,
+    written and fsynced as each PDF finishes, so a run that dies part way
+    can be resumed without extracting (and paying for) those PDFs again.
+
+    Entries are keyed by the PDF's content digest, so a file that changed
+    since it was journaled is extracted again. When a PDF appears more
+    than once, the last entry wins.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _load(self):
+        # Drop a last line cut short by a crash, so new entries start on a line of their own
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                logger.warning("Dropping incomplete last line of %s", self.path)
+                f.truncate(data.rfind(b"\n") + 1)
+
+        with open(self.path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # That PDF simply runs again
+                    logger.warning("Skipping unreadable journal line %d in %s", number, self.path)
+                    continue
+                self.entries[entry["digest"]] = entry
+        logger.info("Resuming from %s: %d journaled PDF(s)", self.path, len(self.entries))
+
+    def completed(self, digest: str):
+        """Journaled result of a PDF that finished without error, or None"""
+        entry = self.entries.get(digest)
+        if entry and entry["status"] == "ok":
+            return entry["result"]
+        return None
+
+    def record(self, path: str, digest: str, result=None, error=None):
+        if error:
+            status = "error"
+        elif not extraction_complete(result):
+            # No records (EXTRACTION_FAILED) or a failed bundle employee:
+            # resume runs the PDF again
+            status = "incomplete"
+        else:
+            status = "ok"
+        entry = {
+            "file": path,
+            "digest": digest,
+            "status": status,
+            "result": None if error else result,
+            "error": str(error) if error else None,
+            "at": time.time(),
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self.entries[digest] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
@@ -0,0 +1,126 @@
+import gc
+import glob
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes(pid="self"):
+    # Second field of statm is resident pages
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+def _children(pid="self"):
+    pids = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(path) as f:
+                pids.extend(f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def rss_mb():
+    """
+    Resident memory of this process plus its direct children (the OCR
+    pool) in MB, or None where /proc is not available.
+    """
+    try:
+        total = _rss_bytes()
+    except OSError:
+        return None
+    for pid in _children():
+        try:
+            total += _rss_bytes(pid)
+        except OSError:
+            # The child exited in the meantime
+            pass
+    return total / (1024 * 1024)
+
+
+def _default_limit_mb():
+    """80% of the machine's memory, or 0 (no limit) if it can't be read"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) / 1024 * 0.8
+    except OSError:
+        pass
+    return 0
+
+
+# Resident memory ceiling in MB for extraction: 80% of RAM when unset,
+# MEMORY_LIMIT_MB=0 disables backpressure
+MEMORY_LIMIT_MB = float(os.getenv("MEMORY_LIMIT_MB") or _default_limit_mb())
+
+
+class MemoryGate:
+    """
+    Backpressure for a worker pool: acquire() holds a new job back while
+    resident memory is above the limit and other jobs are still running
+    (their completion is what frees memory). A job always starts when
+    nothing else is in flight, so the pool can't stall.
+    """
+
+    def __init__(self, limit_mb=None, poll=0.25):
+        self.limit_mb = MEMORY_LIMIT_MB if limit_mb is None else limit_mb
+        self.poll = poll
+        self.active = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.peak_mb = 0.0
+        self._cond = threading.Condition()
+
+    def _over_limit(self):
+        current = rss_mb()
+        if current is None:
+            return False
+        self.peak_mb = max(self.peak_mb, current)
+        return current > self.limit_mb
+
+    def acquire(self):
+        if not self.limit_mb:
+            with self._cond:
+                self.active += 1
+            return 0.0
+
+        start = time.monotonic()
+        with self._cond:
+            if self.active and self._over_limit():
+                self.waits += 1
+                # Warn once per run; later waits only at debug level
+                log = logger.warning if self.waits == 1 else logger.debug
+                log(
+                    "Memory above %.0f MB, holding back new work until %d running job(s) finish",
+                    self.limit_mb, self.active
+                )
+                gc.collect()
+                while self.active and self._over_limit():
+                    self._cond.wait(timeout=self.poll)
+            self.active += 1
+            waited = time.monotonic() - start
+            self.wait_seconds += waited
+
+        return waited
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit_mb": round(self.limit_mb),
+                "peak_rss_mb": round(self.peak_mb),
+                "waits": self.waits,
+                "wait_s": round(self.wait_seconds, 2),
+            }
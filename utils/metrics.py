@@ -0,0 +1,160 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import logging
+import os
+import threading
+import time
+
+# Pipeline stages, in the order they are reported
+STAGES = ["text_extraction", "table_extraction", "render", "ocr", "classify", "llm", "regex", "payroll", "excel_write"]
+
+_local = threading.local()
+
+
+def configure_logging(level=None):
+    """Leveled logging for the pipeline; LOG_LEVEL=WARNING (or higher) silences progress output"""
+    logging.basicConfig(
+        level=(level or os.getenv("LOG_LEVEL", "INFO")).upper(),
+        format="%(asctime)s %(levelname)-7s %(name)s: %(message)s",
+    )
+
+
+def _percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """
+    Wall time samples per pipeline stage for one run.
+
+    Each PDF contributes one sample per stage it went through (the sum of
+    that stage's time within the PDF); stages timed outside a PDF, such as
+    batched LLM calls or the workbook write, add one sample per call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._seconds = defaultdict(list)
+            self._counts = defaultdict(int)
+            self.pdfs = 0
+
+    def record(self, stage: str, seconds: float, count: int = 1):
+        with self._lock:
+            self._seconds[stage].append(seconds)
+            self._counts[stage] += count
+
+    def count_pdf(self):
+        with self._lock:
+            self.pdfs += 1
+
+    def summary(self) -> dict:
+        """count, total, p50, p95 and max seconds per stage"""
+        with self._lock:
+            stages = [s for s in STAGES if s in self._seconds]
+            stages += sorted(s for s in self._seconds if s not in STAGES)
+            summary = {}
+            for stage in stages:
+                values = sorted(self._seconds[stage])
+                summary[stage] = {
+                    "samples": len(values),
+                    "count": self._counts[stage],
+                    "total_s": round(sum(values), 4),
+                    "p50_s": round(_percentile(values, 50), 4),
+                    "p95_s": round(_percentile(values, 95), 4),
+                    "max_s": round(values[-1], 4),
+                }
+            return summary
+
+    def to_json(self, path=None) -> str:
+        payload = json.dumps({"pdfs": self.pdfs, "stages": self.summary()}, indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(payload)
+        return payload
+
+    def to_prometheus(self, path=None) -> str:
+        """Prometheus textfile-collector format"""
+        lines = [
+            "# HELP attendance_stage_seconds Per-PDF wall time of each pipeline stage.",
+            "# TYPE attendance_stage_seconds summary",
+        ]
+        summary = self.summary()
+        for stage, s in summary.items():
+            lines.append(f'attendance_stage_seconds{{stage="{stage}",quantile="0.5"}} {s["p50_s"]}')
+            lines.append(f'attendance_stage_seconds{{stage="{stage}",quantile="0.95"}} {s["p95_s"]}')
+            lines.append(f'attendance_stage_seconds{{stage="{stage}",quantile="1"}} {s["max_s"]}')
+            lines.append(f'attendance_stage_seconds_sum{{stage="{stage}"}} {s["total_s"]}')
+            lines.append(f'attendance_stage_seconds_count{{stage="{stage}"}} {s["samples"]}')
+        lines.append("# HELP attendance_stage_calls_total Calls (pages, requests, ...) per pipeline stage.")
+        lines.append("# TYPE attendance_stage_calls_total counter")
+        for stage, s in summary.items():
+            lines.append(f'attendance_stage_calls_total{{stage="{stage}"}} {s["count"]}')
+        lines.append("# HELP attendance_pdfs_total PDFs processed in the run.")
+        lines.append("# TYPE attendance_pdfs_total counter")
+        lines.append(f"attendance_pdfs_total {self.pdfs}")
+
+        payload = "\n".join(lines) + "\n"
+        if path:
+            # Write-then-rename so the collector never reads a partial file
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        return payload
+
+
+_metrics = RunMetrics()
+
+
+def get_metrics() -> RunMetrics:
+    """Process-wide metrics of the current run"""
+    return _metrics
+
+
+@contextmanager
+def track_pdf():
+    """Collect stage timings of one PDF (on this thread) and add them to the run"""
+    trace = defaultdict(lambda: [0.0, 0])
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+        for stage_name, (seconds, count) in trace.items():
+            _metrics.record(stage_name, seconds, count)
+        _metrics.count_pdf()
+
+
+def add_stage_time(name: str, seconds: float, count: int = 1):
+    """Attribute time to a stage of the current PDF, or record it directly"""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        _metrics.record(name, seconds, count)
+    else:
+        trace[name][0] += seconds
+        trace[name][1] += count
+
+
+@contextmanager
+def stage(name: str):
+    """Time a pipeline stage, attributing it to the current PDF if there is one"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, time.perf_counter() - start)
+
+
+def stage_seconds(name: str) -> float:
+    """Time spent so far in a stage for the current PDF"""
+    trace = getattr(_local, "trace", None)
+    if trace is None or name not in trace:
+        return 0.0
+    return trace[name][0]
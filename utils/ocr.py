@@ -0,0 +1,93 @@
+from PIL import Image
+import hashlib
+import numpy as np
+import os
+
+# Tesseract page segmentation mode: 6 reads the page as one uniform block,
+# which keeps grid rows together instead of splitting cells into columns
+OCR_PSM = int(os.getenv("OCR_PSM", "6"))
+
+# Grayscale, binarize and crop pages before OCR (0 sends the raw render)
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") != "0"
+
+# Bump whenever preprocess() or the tesseract settings change, so cached
+# OCR text produced by the old pipeline is no longer reused
+PREPROCESS_VERSION = "1"
+
+# Rows/columns with less ink than this fraction count as blank margin
+MIN_INK = 0.002
+
+# Rows with more ink than this fraction are ruling lines, not text
+RULE_INK = 0.5
+
+# Blank border kept around the cropped content, as a fraction of its size
+CROP_PADDING = 0.02
+
+
+def otsu_threshold(gray) -> int:
+    """Gray level that best separates ink from paper (Otsu's method) in a uint8 array"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    omega = np.cumsum(hist) / gray.size
+    mu = np.cumsum(hist * np.arange(256)) / gray.size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1 - omega))
+    return int(np.nanargmax(between)) if np.isfinite(between).any() else 127
+
+
+def ink_mask(img):
+    """Boolean array, True where the page image has ink"""
+    gray = np.asarray(img.convert("L"))
+    return gray <= otsu_threshold(gray)
+
+
+def _span(profile, size):
+    """First and last index where profile has ink, padded; None when blank"""
+    inked = np.flatnonzero(profile > MIN_INK)
+    if not inked.size:
+        return None
+    pad = int(size * CROP_PADDING)
+    return max(0, inked[0] - pad), min(size, inked[-1] + 1 + pad)
+
+
+def preprocess(img):
+    """
+    Binarized (black ink on white) copy of a page render, cropped to its
+    inked region. Scanned timesheets carry wide blank or shaded margins;
+    dropping them and the gray background speeds tesseract up on dense
+    grids. The whole content is kept (not just the ruled table), since
+    the employee header above the grid is needed too.
+    """
+    ink = ink_mask(img)
+    rows = _span(ink.mean(axis=1), ink.shape[0])
+    cols = _span(ink.mean(axis=0), ink.shape[1])
+    if rows is None or cols is None:
+        return img.convert("L")
+
+    ink = ink[rows[0]:rows[1], cols[0]:cols[1]]
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+
+def text_line_height(img):
+    """
+    Median height in pixels of the text lines of a page image, from the
+    rows with ink between blank rows and ruling lines; None if no text.
+    """
+    profile = ink_mask(img).mean(axis=1)
+    text_rows = (profile > MIN_INK) & (profile < RULE_INK)
+    # Lengths of the runs of consecutive text rows
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], text_rows.astype(np.int8), [0]))))
+    heights = edges[1::2] - edges[::2]
+    # Runs of 1-2 pixels are specks and thin lines, not text
+    heights = heights[heights >= 3]
+    return float(np.median(heights)) if heights.size else None
+
+
+def image_key(img) -> str:
+    """Content hash of a page render plus the OCR settings, for the OCR cache"""
+    digest = hashlib.sha256(img.tobytes())
+    digest.update(f"{img.mode}:{img.size}:psm{OCR_PSM}:pre{int(OCR_PREPROCESS)}:v{PREPROCESS_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def tesseract_config() -> str:
+    return f"--psm {OCR_PSM}"
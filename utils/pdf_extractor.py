@@ -1,28 +1,210 @@
+from utils.metrics import stage
+from utils.cache import get_ocr_cache
+from utils.ocr import preprocess, text_line_height, image_key, tesseract_config, OCR_PREPROCESS
 import pdfplumber
 import pytesseract
 from PIL import Image
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import io
+import os
+import threading
 
-def extract_text_and_images(pdf_bytes: bytes):
-    text = ""
-    images = []
+# Pages (and documents) with less text than this are treated as scanned
+MIN_TEXT_CHARS = 50
 
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+# Number of tesseract processes used to OCR pages in parallel
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+
+# Render resolution for OCR. Pages are rendered at OCR_DPI and the text
+# line height is measured on that render: large print is scaled down so
+# a line is about OCR_LINE_PX tall (not below OCR_MIN_DPI), and only
+# lines shorter than OCR_MIN_LINE_PX, too small for tesseract, are
+# rendered again finer (up to OCR_MAX_DPI)
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", "150"))
+OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", "400"))
+OCR_LINE_PX = 32
+OCR_MIN_LINE_PX = 20
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def open_pdf(source):
+    """Open a PDF given as bytes or as a file path (read lazily from disk)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return pdfplumber.open(source)
+
+
+def iter_pages(source, want_tables=None):
+    """
+    Yield (text, tables) for each page in order, parsing one page at a time.
+
+    tables holds page.extract_tables() (rows of cell strings) for the
+    pages where want_tables(text) is true, else None, so the table finder
+    only runs on pages that look like a grid.
+    """
+    with open_pdf(source) as pdf:
         for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text += page_text + "\n"
+            with stage("text_extraction"):
+                text = page.extract_text() or ""
+            tables = None
+            if want_tables is not None and want_tables(text):
+                with stage("table_extraction"):
+                    tables = page.extract_tables()
+            # Drop the parsed layout objects before moving to the next page
+            page.close()
+            yield text, tables
+
+
+def iter_page_texts(source):
+    """Yield the text layer of each page in order, parsing one page at a time"""
+    for text, _ in iter_pages(source):
+        yield text
+
+
+def extract_text_pages(source):
+    """Extract the text layer of every page without rendering anything"""
+    return list(iter_page_texts(source))
+
+
+def ocr_resolution(line_height) -> int:
+    """DPI a page needs for OCR, given its text line height in pixels at OCR_DPI"""
+    if not line_height:
+        return OCR_DPI
+    dpi = round(OCR_LINE_PX * OCR_DPI / line_height / 50) * 50
+    if line_height >= OCR_MIN_LINE_PX:
+        return max(OCR_MIN_DPI, min(OCR_DPI, dpi))
+    return min(OCR_MAX_DPI, max(OCR_DPI, dpi))
+
+
+def render_page(page, resolution=None):
+    """
+    Render a page for OCR. Without a resolution, the page is rendered once
+    at OCR_DPI and the line height measured on that image decides its
+    final size (see ocr_resolution): large print is downscaled and only
+    small print is rendered a second time, at a higher DPI.
+    """
+    with stage("render"):
+        img = page.to_image(resolution=resolution or OCR_DPI).original
+    if resolution:
+        return img
+
+    dpi = ocr_resolution(text_line_height(img))
+    with stage("render"):
+        if dpi < OCR_DPI:
+            size = (round(img.width * dpi / OCR_DPI), round(img.height * dpi / OCR_DPI))
+            img = img.resize(size, Image.LANCZOS)
+        elif dpi > OCR_DPI:
+            img = page.to_image(resolution=dpi).original
+    return img
+
+
+def render_pages(source, page_numbers=None, resolution=None):
+    """
+    Lazily render pages to PIL images, one page at a time.
+
+    Only the pages in page_numbers (0-based) are rendered; all pages if None.
+    Without a resolution, each page gets its own (see render_page).
+    """
+    with open_pdf(source) as pdf:
+        if page_numbers is None:
+            page_numbers = range(len(pdf.pages))
 
+        for page_number in page_numbers:
+            page = pdf.pages[page_number]
             try:
-                img = page.to_image(resolution=200).original
-                images.append(img)
+                img = render_page(page, resolution)
             except:
-                pass
+                img = None
+            finally:
+                page.close()
 
-    return text.strip(), images
+            if img is not None:
+                yield img
 
 
-def ocr_images(images):
-    ocr_text = ""
+def extract_text_and_images(source, pages=None, first_page=0):
+    """
+    Return the document text, a lazy iterator of images for the pages
+    without a usable text layer (the only ones worth OCRing), and how
+    many such pages there are. source is the PDF's bytes or file path.
+
+    pages may hold already extracted page texts, starting at page
+    first_page (0-based) of the PDF, e.g. one employee of a bundle.
+    """
+    if pages is None:
+        pages = extract_text_pages(source)
+    text = "\n".join(pages).strip()
+    empty_pages = [
+        first_page + i for i, page_text in enumerate(pages)
+        if len(page_text.strip()) < MIN_TEXT_CHARS
+    ]
+
+    return text, render_pages(source, empty_pages), len(empty_pages)
+
+
+def _get_ocr_pool():
+    """Process pool shared by every OCR call (created on first use)"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _ocr_pool
+
+
+def _ocr_page(img):
+    if OCR_PREPROCESS:
+        img = preprocess(img)
+    return pytesseract.image_to_string(img, config=tesseract_config())
+
+
+def _cached(text):
+    future = Future()
+    future.set_result(text)
+    return future
+
+
+def iter_ocr_text(images, workers=None):
+    """
+    OCR page images in parallel and yield each page's text in page order.
+
+    Images are consumed lazily: at most two pages per worker are in flight,
+    so rendering, OCR and the caller all proceed page by page. Pages seen
+    before (e.g. the cover or approval page repeated in every bundle) are
+    answered from the OCR cache without running tesseract.
+    """
+    workers = workers or OCR_WORKERS
+    cache = get_ocr_cache()
+    pool = _get_ocr_pool() if workers > 1 else None
+    pending = deque()
+
+    def finish():
+        key, future = pending.popleft()
+        text = future.result()
+        if key is not None:
+            cache.put(key, text)
+        return text
+
     for img in images:
-        ocr_text += pytesseract.image_to_string(img) + "\n"
+        key = image_key(img) if cache else None
+        text = cache.get(key) if cache else None
+        if text is not None:
+            pending.append((None, _cached(text)))
+        elif pool is None:
+            pending.append((key, _cached(_ocr_page(img))))
+        else:
+            pending.append((key, pool.submit(_ocr_page, img)))
+        if len(pending) >= max(1, workers * 2) or pool is None:
+            yield finish()
+
+    while pending:
+        yield finish()
+
+
+def ocr_images(images, workers=None):
+    ocr_text = ""
+    for page_text in iter_ocr_text(images, workers):
+        ocr_text += page_text + "\n"
     return ocr_text.strip()
@@ -0,0 +1,74 @@
+import logging
+import re
+from agents.classifier import is_day_header, DATE_PATTERN
+from agents.llm_client import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Employee / period header lines worth keeping for the LLM
+HEADER_LINE = re.compile(
+    r"\b(?:Employee|Emp\.?\s*(?:Name|Code)|Name|ID|Code|PO|Period|Month|Total)\b",
+    re.I
+)
+
+# Grid row labels (same vocabulary the extraction prompt describes)
+GRID_ROW = re.compile(
+    r"^\s*(?:Regular|Reg\.?\s*HR|Normal|Hours|Daily|Overtime|OT|Leaves?|Absent"
+    r"|Holidays?|Off(?:line)?)\b",
+    re.I
+)
+
+DAY_NAMES = re.compile(r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b", re.I)
+
+# A wrapped continuation of a grid row: nothing but hours and day markers
+GRID_VALUES = re.compile(r"^(?:\s*(?:\d+(?:\.\d+)?|B|L|AL|SL|H|EH|LH|OFF)\b)+\s*$", re.I)
+
+
+def reduce_text(text: str) -> str:
+    """
+    Keep only the employee header lines, day-number/day-name headers,
+    grid rows and dated lines of a timesheet, dropping letterheads,
+    signatures, approval blocks and footers.
+
+    Returns the original text if no grid or dated lines were found.
+    """
+    kept = []
+    seen_headers = set()
+    found_data = False
+    in_grid = False
+
+    for line in text.splitlines():
+        if GRID_ROW.match(line) or is_day_header(line, min_run=5) or len(DAY_NAMES.findall(line)) >= 5:
+            kept.append(line)
+            found_data = True
+            in_grid = True
+        elif in_grid and GRID_VALUES.match(line):
+            kept.append(line)
+        elif DATE_PATTERN.search(line):
+            kept.append(line)
+            found_data = True
+            in_grid = False
+        elif HEADER_LINE.search(line):
+            # Headers repeated on every page of an export only need to be sent once
+            if line.strip() not in seen_headers:
+                seen_headers.add(line.strip())
+                kept.append(line)
+            in_grid = False
+        else:
+            in_grid = False
+
+    if not found_data:
+        return text
+
+    return "\n".join(kept)
+
+
+def reduce_for_llm(text: str) -> str:
+    """reduce_text with a log line showing the token savings"""
+    reduced = reduce_text(text)
+    before, after = estimate_tokens(text), estimate_tokens(reduced)
+    logger.info(
+        "Prompt text reduced: ~%d → ~%d tokens (%d%% saved)",
+        before, after, 100 * (before - after) // max(before, 1)
+    )
+    return reduced